@@ -0,0 +1,54 @@
+"""
+Short-lived per-date cache of raw Google Calendar events for the debug scripts
+"""
+
+import threading
+import time
+from datetime import datetime, time as dt_time
+
+CACHE_TTL_SECONDS = 60
+CACHE_MAX_ENTRIES = 128
+
+# (calendar_id, date) -> (expires_at, events)
+_cache = {}
+_lock = threading.Lock()
+
+def get_cached_events(calendar_id, day):
+    """Return cached events for (calendar_id, day), or None if missing or expired"""
+    key = (calendar_id, day)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        expires_at, events = entry
+        if expires_at <= time.monotonic():
+            del _cache[key]
+            return None
+        return events
+
+def store_events(calendar_id, day, events):
+    """Cache events for (calendar_id, day) for CACHE_TTL_SECONDS"""
+    with _lock:
+        if len(_cache) >= CACHE_MAX_ENTRIES:
+            # Evict the entry closest to expiry
+            del _cache[min(_cache, key=lambda k: _cache[k][0])]
+        _cache[(calendar_id, day)] = (time.monotonic() + CACHE_TTL_SECONDS, events)
+
+def get_events_cached(service, calendar_id, day, tz):
+    """Get all events on day from the cache, fetching and caching them on a miss"""
+    events = get_cached_events(calendar_id, day)
+    if events is not None:
+        return events
+    
+    start = tz.localize(datetime.combine(day, dt_time.min))
+    end = tz.localize(datetime.combine(day, dt_time(23, 59, 59)))
+    result = service.events().list(
+        calendarId=calendar_id,
+        timeMin=start.isoformat(),
+        timeMax=end.isoformat(),
+        singleEvents=True,
+        orderBy='startTime'
+    ).execute()
+    events = result.get('items', [])
+    store_events(calendar_id, day, events)
+    return events
@@ -0,0 +1,27 @@
+"""
+Environment settings for the debug scripts, captured once after loading .env
+"""
+
+import os
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+@dataclass(frozen=True)
+class _Cfg:
+    """Snapshot of the environment values the debug scripts read"""
+    openai_api_key: str
+    timezone: str
+    calendar_id: str
+    credentials_path: str
+    verbose: bool
+
+def load_cfg(override=False):
+    """Reload .env and return a fresh settings snapshot; override lets .env replace set variables"""
+    load_dotenv(override=override)
+    return _Cfg(
+        openai_api_key=os.getenv('OPENAI_API_KEY', ''),
+        timezone=os.getenv('TIMEZONE', 'Asia/Kolkata'),
+        calendar_id=os.getenv('CALENDAR_ID', 'primary'),
+        credentials_path=os.getenv('GOOGLE_CREDENTIALS_PATH', 'config/credentials.json'),
+        verbose=bool(os.getenv('TAILORTALK_DEBUG_VERBOSE'))
+    )
@@ -163,6 +163,55 @@ class AdvancedDateTimeParser:
         
         return result
     
+    def parse_datetime_from_text(self, text: str) -> Dict[str, any]:
+        """
+        Parse a booking message into a date and one or more times
+        
+        Args:
+            text: Natural language booking message, e.g. "Book tomorrow at 10am and 3pm"
+            
+        Returns:
+            Dict with success flag, first date/time, and every requested slot
+        """
+        result = self.parse_appointment_request(text)
+        times = self._extract_all_times(text.lower().strip()) if result['date'] else []
+        
+        if times:
+            result['time'] = times[0]
+        
+        result['success'] = bool(result['date'] and result['time'])
+        result['slots'] = [{'date': result['date'], 'time': time_str} for time_str in times]
+        
+        return result
+    
+    def _extract_all_times(self, text: str) -> List[str]:
+        """Extract every time mentioned in text, in order of appearance"""
+        found = []
+        claimed_spans = []
+        
+        for pattern, handler in self.time_patterns:
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                # More specific patterns come first and claim their span of the text
+                if any(match.start() < end and start < match.end() for start, end in claimed_spans):
+                    continue
+                
+                try:
+                    parsed_time = handler(*match.groups()) if match.groups() else handler()
+                except Exception as e:
+                    logger.warning(f"Error parsing time with pattern {pattern}: {e}")
+                    continue
+                
+                if self._is_valid_time(parsed_time):
+                    claimed_spans.append(match.span())
+                    found.append((match.start(), parsed_time))
+        
+        times = []
+        for _, time_str in sorted(found):
+            if time_str not in times:
+                times.append(time_str)
+        
+        return times
+    
     def _extract_date_precise(self, text: str) -> Optional[Dict]:
         """Extract date with high precision"""
         for pattern, handler in self.date_patterns:
@@ -1,12 +1,16 @@
 import os
 import json
 import logging
+import threading
 from datetime import datetime, timedelta, time, date
 from typing import List, Dict, Optional, Any
 import pytz
+import httplib2
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,8 @@ class EnhancedCalendarManager:
         self.credentials_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
         self.calendar_id = os.getenv('CALENDAR_ID', 'primary')
         self.service = None
+        # One keep-alive HTTP client per thread (httplib2 is not thread-safe)
+        self._http_local = threading.local()
 
         self.business_start = 9
         self.business_end = 18
@@ -64,8 +70,13 @@ class EnhancedCalendarManager:
             if not credentials:
                 raise Exception("Failed to obtain service account credentials")
 
+            # Route every request through the executing thread's own connection
+            def build_request(http, *args, **kwargs):
+                return HttpRequest(self._get_authorized_http(credentials), *args, **kwargs)
+
             try:
-                self.service = build('calendar', 'v3', credentials=credentials)
+                self.service = build('calendar', 'v3', http=self._get_authorized_http(credentials),
+                                     requestBuilder=build_request)
                 logger.info("✅ Google Calendar service initialized with service account")
             except Exception as e:
                 logger.error(f"Failed to build Calendar service: {e}")
@@ -73,6 +84,13 @@ class EnhancedCalendarManager:
 
         return self.service
 
+    def _get_authorized_http(self, credentials) -> AuthorizedHttp:
+        """Get the calling thread's authorized HTTP client"""
+        http = getattr(self._http_local, 'http', None)
+        if http is None:
+            http = self._http_local.http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=30))
+        return http
+
     def get_availability(self, date_str: str) -> List[str]:
         try:
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
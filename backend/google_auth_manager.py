@@ -7,6 +7,7 @@ import json
 import logging
 import hashlib
 import secrets
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import pytz
@@ -41,6 +42,9 @@ class GoogleAuthManager:
         self.user_credentials: Dict[str, Credentials] = {}
         self.user_info_cache: Dict[str, Dict[str, Any]] = {}
         
+        # Sessions are saved from worker threads; one writer at a time
+        self._save_lock = threading.Lock()
+        
         # Encryption for secure storage
         self.encryption_key = self._get_or_create_encryption_key()
         self.cipher_suite = Fernet(self.encryption_key)
@@ -102,36 +106,43 @@ class GoogleAuthManager:
     def _save_sessions(self):
         """Save current sessions to encrypted storage"""
         try:
-            sessions_data = {}
-            
-            for user_id, session_data in self.active_sessions.items():
-                # Include credentials in session data
-                if user_id in self.user_credentials:
-                    credentials = self.user_credentials[user_id]
-                    session_data['credentials'] = {
-                        'token': credentials.token,
-                        'refresh_token': credentials.refresh_token,
-                        'token_uri': credentials.token_uri,
-                        'client_id': credentials.client_id,
-                        'client_secret': credentials.client_secret,
-                        'scopes': credentials.scopes
-                    }
-                
-                sessions_data[user_id] = session_data
-            
-            # Encrypt and save
-            json_data = json.dumps(sessions_data)
-            encrypted_data = self.cipher_suite.encrypt(json_data.encode())
-            
-            sessions_file = self.auth_data_dir / 'sessions.json'
-            with open(sessions_file, 'w') as f:
-                f.write(encrypted_data.decode())
-            
-            logger.debug(f"Saved {len(sessions_data)} sessions")
-            
+            with self._save_lock:
+                self._write_sessions_file()
         except Exception as e:
             logger.error(f"Error saving sessions: {e}")
     
+    def _write_sessions_file(self):
+        """Encrypt a snapshot of the sessions and atomically replace the sessions file"""
+        sessions_data = {}
+        
+        # Snapshot first: other threads may add or revoke sessions meanwhile
+        for user_id, session_data in list(self.active_sessions.items()):
+            # Include credentials in session data
+            credentials = self.user_credentials.get(user_id)
+            if credentials is not None:
+                session_data['credentials'] = {
+                    'token': credentials.token,
+                    'refresh_token': credentials.refresh_token,
+                    'token_uri': credentials.token_uri,
+                    'client_id': credentials.client_id,
+                    'client_secret': credentials.client_secret,
+                    'scopes': credentials.scopes
+                }
+            
+            sessions_data[user_id] = session_data
+        
+        # Encrypt and save; readers never see a half-written file
+        json_data = json.dumps(sessions_data)
+        encrypted_data = self.cipher_suite.encrypt(json_data.encode())
+        
+        sessions_file = self.auth_data_dir / 'sessions.json'
+        temp_file = sessions_file.with_suffix('.json.tmp')
+        with open(temp_file, 'w') as f:
+            f.write(encrypted_data.decode())
+        os.replace(temp_file, sessions_file)
+        
+        logger.debug(f"Saved {len(sessions_data)} sessions")
+    
     def create_auth_flow(self, redirect_uri: str = 'http://localhost:8001/auth/callback') -> Flow:
         """Create OAuth2 flow for authentication"""
         try:
@@ -264,6 +275,10 @@ class GoogleAuthManager:
         
         return None
     
+    def has_active_session(self, user_id: str) -> bool:
+        """Check if user has a session, without validating or touching it"""
+        return user_id in self.active_sessions
+    
     def is_user_authenticated(self, user_id: str) -> bool:
         """Check if user is authenticated"""
         if user_id not in self.active_sessions:
@@ -1,8 +1,12 @@
 import os
 import pickle
+import threading
+import httplib2
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import pytz
@@ -17,6 +21,8 @@ SCOPES = ['https://www.googleapis.com/auth/calendar']
 class GoogleCalendarManager:
     def __init__(self):
         self.service = None
+        # One keep-alive HTTP client per thread (httplib2 is not thread-safe)
+        self._http_local = threading.local()
         # Use the full path from your .env file
         self.credentials_path = os.getenv('GOOGLE_CREDENTIALS_PATH', 'config/credentials.json')
         # Store token in the same directory as credentials
@@ -73,9 +79,21 @@ class GoogleCalendarManager:
             with open(self.token_path, 'wb') as token:
                 pickle.dump(creds, token)
         
-        self.service = build('calendar', 'v3', credentials=creds)
+        # Route every request through the executing thread's own connection
+        def build_request(http, *args, **kwargs):
+            return HttpRequest(self._get_authorized_http(creds), *args, **kwargs)
+        
+        self.service = build('calendar', 'v3', http=self._get_authorized_http(creds),
+                             requestBuilder=build_request)
         print("✅ Successfully authenticated with Google Calendar!")
     
+    def _get_authorized_http(self, creds) -> AuthorizedHttp:
+        """Get the calling thread's authorized HTTP client"""
+        http = getattr(self._http_local, 'http', None)
+        if http is None:
+            http = self._http_local.http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+        return http
+    
     def get_availability(self, date: str, start_hour: int = 9, end_hour: int = 18) -> List[str]:
         """Get available time slots for a specific date"""
         try:
@@ -109,66 +127,70 @@ class GoogleCalendarManager:
                     event_time = event['start']['dateTime']
                     print(f"   📝 Event: {event_title} at {event_time}")
         
-            # Generate all possible slots (1-hour intervals)
-            all_slots = []
-            current_time = start_time
-            while current_time < end_time:
-                all_slots.append(current_time.strftime('%H:%M'))
-                current_time += timedelta(hours=1)
-        
-            print(f"🕐 All possible slots: {all_slots}")
+            return self.available_slots_from_events(events, start_time, end_time)
         
-            # Remove booked slots - improved logic
-            booked_slots = set()
-            for event in events:
-                if 'start' in event and 'dateTime' in event['start']:
-                    try:
-                        event_start_str = event['start']['dateTime']
-                        event_end_str = event['end']['dateTime']
+        except Exception as e:
+            print(f"❌ Error getting availability: {e}")
+            # Return default slots as fallback
+            return ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00", "17:00"]
+    
+    def available_slots_from_events(self, events: List[Dict], start_time: datetime, end_time: datetime) -> List[str]:
+        """Compute free hourly slots between start_time and end_time from already-fetched events"""
+        # Generate all possible slots (1-hour intervals)
+        all_slots = []
+        current_time = start_time
+        while current_time < end_time:
+            all_slots.append(current_time.strftime('%H:%M'))
+            current_time += timedelta(hours=1)
+        
+        print(f"🕐 All possible slots: {all_slots}")
+        
+        # Remove booked slots - improved logic
+        booked_slots = set()
+        for event in events:
+            if 'start' in event and 'dateTime' in event['start']:
+                try:
+                    event_start_str = event['start']['dateTime']
+                    event_end_str = event['end']['dateTime']
                     
-                        # Parse start time
-                        if event_start_str.endswith('Z'):
-                            event_start = datetime.fromisoformat(event_start_str.replace('Z', '+00:00'))
-                        else:
-                            event_start = datetime.fromisoformat(event_start_str)
+                    # Parse start time
+                    if event_start_str.endswith('Z'):
+                        event_start = datetime.fromisoformat(event_start_str.replace('Z', '+00:00'))
+                    else:
+                        event_start = datetime.fromisoformat(event_start_str)
                     
-                        # Parse end time
-                        if event_end_str.endswith('Z'):
-                            event_end = datetime.fromisoformat(event_end_str.replace('Z', '+00:00'))
-                        else:
-                            event_end = datetime.fromisoformat(event_end_str)
+                    # Parse end time
+                    if event_end_str.endswith('Z'):
+                        event_end = datetime.fromisoformat(event_end_str.replace('Z', '+00:00'))
+                    else:
+                        event_end = datetime.fromisoformat(event_end_str)
                     
-                        # Convert to local timezone
-                        if event_start.tzinfo is None:
-                            event_start = pytz.UTC.localize(event_start)
-                        if event_end.tzinfo is None:
-                            event_end = pytz.UTC.localize(event_end)
-                        
-                        event_start_local = event_start.astimezone(self.timezone)
-                        event_end_local = event_end.astimezone(self.timezone)
-                        
-                        # Block all hours that overlap with this event
-                        current_hour = event_start_local.replace(minute=0, second=0, microsecond=0)
-                        while current_hour < event_end_local:
-                            hour_slot = current_hour.strftime('%H:%M')
-                            if hour_slot in all_slots:
-                                booked_slots.add(hour_slot)
-                                print(f"   ❌ Blocking slot {hour_slot} due to event: {event.get('summary', 'No title')}")
-                            current_hour += timedelta(hours=1)
+                    # Convert to local timezone
+                    if event_start.tzinfo is None:
+                        event_start = pytz.UTC.localize(event_start)
+                    if event_end.tzinfo is None:
+                        event_end = pytz.UTC.localize(event_end)
                     
-                    except Exception as e:
-                        print(f"⚠️ Error parsing event time: {e}")
-        
-            available_slots = [slot for slot in all_slots if slot not in booked_slots]
-            print(f"✅ Available slots after filtering: {available_slots}")
-            print(f"❌ Booked slots: {list(booked_slots)}")
+                    event_start_local = event_start.astimezone(self.timezone)
+                    event_end_local = event_end.astimezone(self.timezone)
+                    
+                    # Block all hours that overlap with this event
+                    current_hour = event_start_local.replace(minute=0, second=0, microsecond=0)
+                    while current_hour < event_end_local:
+                        hour_slot = current_hour.strftime('%H:%M')
+                        if hour_slot in all_slots:
+                            booked_slots.add(hour_slot)
+                            print(f"   ❌ Blocking slot {hour_slot} due to event: {event.get('summary', 'No title')}")
+                        current_hour += timedelta(hours=1)
+                
+                except Exception as e:
+                    print(f"⚠️ Error parsing event time: {e}")
         
-            return available_slots
+        available_slots = [slot for slot in all_slots if slot not in booked_slots]
+        print(f"✅ Available slots after filtering: {available_slots}")
+        print(f"❌ Booked slots: {list(booked_slots)}")
         
-        except Exception as e:
-            print(f"❌ Error getting availability: {e}")
-            # Return default slots as fallback
-            return ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00", "17:00"]
+        return available_slots
     
     def create_event(self, title: str, start_datetime: datetime, duration_minutes: int = 60, 
                     description: str = "", attendee_email: Optional[str] = None) -> str:
@@ -2,6 +2,7 @@ from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, AIMessage
 from typing import TypedDict, List, Optional
+import asyncio
 import re
 from datetime import datetime, timedelta
 import json
@@ -372,7 +373,8 @@ How can I help you today?
         
         try:
             print(f"🔄 Processing message: {message}")
-            result = self.graph.invoke(initial_state)
+            # The graph (LLM + Calendar calls) is blocking; keep it off the event loop
+            result = await asyncio.to_thread(self.graph.invoke, initial_state)
             
             # Get the last assistant message
             assistant_messages = [msg for msg in result["messages"] if msg["role"] == "assistant"]
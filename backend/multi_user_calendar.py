@@ -3,14 +3,17 @@ Multi-User Calendar Manager for TailorTalk Enhanced
 Handles calendar operations for multiple authenticated users
 """
 import logging
+import threading
 from datetime import datetime, timedelta, time
 from typing import Dict, List, Optional, Any
-import pytz
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
 
 from backend.google_auth_manager import google_auth_manager
-from backend.timezone_manager import timezone_manager
+from backend.timezone_manager import timezone_manager, interval_mask, SLOT_MINUTES
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,12 @@ class MultiUserCalendarManager:
         self.calendar_services: Dict[str, Any] = {}
         self.user_calendars: Dict[str, List[Dict[str, Any]]] = {}
         
+        # Keep-alive HTTP connections, one per worker thread (httplib2 is not thread-safe);
+        # user credentials are bound per request, so users share the thread's sockets
+        self._http_local = threading.local()
+        self._http_clients: List[httplib2.Http] = []
+        self._http_lock = threading.Lock()
+        
         # Default business hours
         self.default_business_hours = {
             'start': time(9, 0),  # 9:00 AM
@@ -28,8 +37,28 @@ class MultiUserCalendarManager:
             'days': [0, 1, 2, 3, 4]  # Monday to Friday
         }
         
+        # Business hours as a 15-minute slot mask, plus the slot starts offered to users
+        business_start = self.default_business_hours['start']
+        business_end = self.default_business_hours['end']
+        business_start_minute = business_start.hour * 60 + business_start.minute
+        business_end_minute = business_end.hour * 60 + business_end.minute
+        self.business_mask = interval_mask(business_start_minute, business_end_minute)
+        self.slot_start_mask = 0
+        for minute in range(business_start_minute, business_end_minute, 30):  # 30-minute intervals
+            self.slot_start_mask |= 1 << (minute // SLOT_MINUTES)
+        
         logger.info("Multi-user Calendar Manager initialized")
     
+    def _get_authorized_http(self, credentials) -> AuthorizedHttp:
+        """Wrap the calling thread's keep-alive connection with credentials"""
+        http = getattr(self._http_local, 'http', None)
+        if http is None:
+            http = self._http_local.http = httplib2.Http(timeout=30)
+            with self._http_lock:
+                self._http_clients.append(http)
+        
+        return AuthorizedHttp(credentials, http=http)
+    
     def _get_calendar_service(self, user_id: str):
         """Get or create calendar service for user"""
         if user_id not in self.calendar_services:
@@ -38,11 +67,30 @@ class MultiUserCalendarManager:
             if not credentials or not credentials.valid:
                 raise ValueError(f"Invalid credentials for user: {user_id}")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            # Route every request through the executing thread's pooled connection
+            def build_request(http, *args, **kwargs):
+                return HttpRequest(self._get_authorized_http(credentials), *args, **kwargs)
+            
+            service = build(
+                'calendar', 'v3',
+                http=self._get_authorized_http(credentials),
+                requestBuilder=build_request
+            )
             self.calendar_services[user_id] = service
         
         return self.calendar_services[user_id]
     
+    def close(self):
+        """Close pooled HTTP connections"""
+        with self._http_lock:
+            for http in self._http_clients:
+                http.close()
+            self._http_clients.clear()
+        
+        self._http_local = threading.local()
+        self.calendar_services.clear()
+        logger.info("Closed calendar HTTP connections")
+    
     def get_user_calendars(self, user_id: str) -> List[Dict[str, Any]]:
         """Get list of calendars for user"""
         try:
@@ -97,7 +145,8 @@ class MultiUserCalendarManager:
             return 'primary'
     
     def get_user_events(self, user_id: str, start_date: datetime, end_date: datetime, 
-                       calendar_id: str = None) -> List[Dict[str, Any]]:
+                       calendar_id: str = None, max_results: int = None,
+                       fields: str = None) -> List[Dict[str, Any]]:
         """Get events for user within date range"""
         try:
             service = self._get_calendar_service(user_id)
@@ -109,13 +158,21 @@ class MultiUserCalendarManager:
             time_min = start_date.isoformat()
             time_max = end_date.isoformat()
             
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
+            list_params = {
+                'calendarId': calendar_id,
+                'timeMin': time_min,
+                'timeMax': time_max,
+                'singleEvents': True,
+                'orderBy': 'startTime'
+            }
+            
+            # Let the API cap and trim the payload instead of slicing client-side
+            if max_results:
+                list_params['maxResults'] = max_results
+            if fields:
+                list_params['fields'] = fields
+            
+            events_result = service.events().list(**list_params).execute()
             
             events = []
             for event in events_result.get('items', []):
@@ -146,7 +203,7 @@ class MultiUserCalendarManager:
             raise
     
     def get_user_availability(self, user_id: str, date_str: str, 
-                            duration_minutes: int = 60) -> List[str]:
+                            duration_minutes: int = 60, calendar_id: str = None) -> List[str]:
         """Get available time slots for user on specific date"""
         try:
             # Parse date
@@ -158,11 +215,11 @@ class MultiUserCalendarManager:
             
             # Localize to user's timezone
             user_tz = timezone_manager.get_current_timezone()
-            start_datetime = user_tz.localize(start_datetime)
-            end_datetime = user_tz.localize(end_datetime)
+            start_datetime = start_datetime.replace(tzinfo=user_tz)
+            end_datetime = end_datetime.replace(tzinfo=user_tz)
             
             # Get existing events
-            existing_events = self.get_user_events(user_id, start_datetime, end_datetime)
+            existing_events = self.get_user_events(user_id, start_datetime, end_datetime, calendar_id)
             
             # Generate available slots
             available_slots = self._generate_available_slots(
@@ -183,39 +240,36 @@ class MultiUserCalendarManager:
         try:
             available_slots = []
             
-            # Business hours
-            business_start = self.default_business_hours['start']
-            business_end = self.default_business_hours['end']
-            
             # Check if target date is a business day
             if target_date.weekday() not in self.default_business_hours['days']:
                 return available_slots
             
-            # Create time slots
-            current_time = datetime.combine(target_date, business_start)
-            end_time = datetime.combine(target_date, business_end)
-            
-            slot_duration = timedelta(minutes=duration_minutes)
-            
-            while current_time + slot_duration <= end_time:
-                slot_end = current_time + slot_duration
-                
-                # Check if slot conflicts with existing events
-                is_available = True
-                for event in existing_events:
-                    event_start = self._parse_event_datetime(event['start'])
-                    event_end = self._parse_event_datetime(event['end'])
-                    
-                    # Check for overlap
-                    if (current_time < event_end and slot_end > event_start):
-                        is_available = False
-                        break
-                
-                if is_available:
-                    available_slots.append(current_time.strftime('%H:%M'))
-                
-                # Move to next slot (30-minute intervals)
-                current_time += timedelta(minutes=30)
+            # Mark the slots covered by existing events, relative to local midnight
+            day_start = datetime.combine(
+                target_date, time.min, tzinfo=timezone_manager.get_current_timezone()
+            )
+            busy_mask = 0
+            for event in existing_events:
+                event_start = self._parse_event_datetime(event['start'])
+                event_end = self._parse_event_datetime(event['end'])
+                start_minute = int((event_start - day_start).total_seconds() // 60)
+                end_minute = -int(-(event_end - day_start).total_seconds() // 60)
+                busy_mask |= interval_mask(start_minute, end_minute)
+            
+            free_mask = self.business_mask & ~busy_mask
+            
+            # A slot start is available when every 15-minute slot of its duration is free
+            slots_needed = -(-duration_minutes // SLOT_MINUTES)
+            fits_mask = free_mask
+            for offset in range(1, slots_needed):
+                fits_mask &= free_mask >> offset
+            fits_mask &= self.slot_start_mask
+            
+            while fits_mask:
+                lowest_bit = fits_mask & -fits_mask
+                minute = (lowest_bit.bit_length() - 1) * SLOT_MINUTES
+                available_slots.append(f"{minute // 60:02d}:{minute % 60:02d}")
+                fits_mask ^= lowest_bit
             
             return available_slots
             
@@ -238,8 +292,7 @@ class MultiUserCalendarManager:
             else:
                 # Date only format
                 date_obj = datetime.strptime(datetime_str, '%Y-%m-%d').date()
-                dt = datetime.combine(date_obj, time.min)
-                dt = timezone_manager.get_current_timezone().localize(dt)
+                dt = datetime.combine(date_obj, time.min, tzinfo=timezone_manager.get_current_timezone())
             
             return dt
             
@@ -247,46 +300,56 @@ class MultiUserCalendarManager:
             logger.error(f"Error parsing datetime {datetime_str}: {e}")
             return datetime.now()
     
+    def _build_event_body(self, date_str: str, time_str: str, 
+                          event_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Build Calendar API event body for a date and time"""
+        # Parse date and time
+        event_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        event_time = datetime.strptime(time_str, '%H:%M').time()
+        
+        # Create start datetime
+        start_datetime = datetime.combine(
+            event_date, event_time, tzinfo=timezone_manager.get_current_timezone()
+        )
+        
+        # Calculate end datetime
+        duration = timedelta(minutes=event_details.get('duration', 60))
+        end_datetime = start_datetime + duration
+        
+        # Create event object
+        event = {
+            'summary': event_details.get('title', 'TailorTalk Appointment'),
+            'description': event_details.get('description', ''),
+            'start': {
+                'dateTime': start_datetime.isoformat(),
+                'timeZone': str(timezone_manager.get_current_timezone())
+            },
+            'end': {
+                'dateTime': end_datetime.isoformat(),
+                'timeZone': str(timezone_manager.get_current_timezone())
+            },
+            'attendees': event_details.get('attendees', []),
+            'reminders': {
+                'useDefault': True
+            }
+        }
+        
+        # Add location if provided
+        if event_details.get('location'):
+            event['location'] = event_details['location']
+        
+        return event
+    
     def create_user_event(self, user_id: str, date_str: str, time_str: str, 
-                         event_details: Dict[str, Any]) -> Dict[str, Any]:
+                         event_details: Dict[str, Any], calendar_id: str = None) -> Dict[str, Any]:
         """Create calendar event for user"""
         try:
             service = self._get_calendar_service(user_id)
-            calendar_id = self.get_primary_calendar_id(user_id)
             
-            # Parse date and time
-            event_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            event_time = datetime.strptime(time_str, '%H:%M').time()
-            
-            # Create start datetime
-            start_datetime = datetime.combine(event_date, event_time)
-            start_datetime = timezone_manager.get_current_timezone().localize(start_datetime)
-            
-            # Calculate end datetime
-            duration = timedelta(minutes=event_details.get('duration', 60))
-            end_datetime = start_datetime + duration
-            
-            # Create event object
-            event = {
-                'summary': event_details.get('title', 'TailorTalk Appointment'),
-                'description': event_details.get('description', ''),
-                'start': {
-                    'dateTime': start_datetime.isoformat(),
-                    'timeZone': str(timezone_manager.get_current_timezone())
-                },
-                'end': {
-                    'dateTime': end_datetime.isoformat(),
-                    'timeZone': str(timezone_manager.get_current_timezone())
-                },
-                'attendees': event_details.get('attendees', []),
-                'reminders': {
-                    'useDefault': True
-                }
-            }
+            if not calendar_id:
+                calendar_id = self.get_primary_calendar_id(user_id)
             
-            # Add location if provided
-            if event_details.get('location'):
-                event['location'] = event_details['location']
+            event = self._build_event_body(date_str, time_str, event_details)
             
             # Create the event
             created_event = service.events().insert(
@@ -300,8 +363,8 @@ class MultiUserCalendarManager:
                 'event_id': created_event['id'],
                 'event_link': created_event.get('htmlLink', ''),
                 'calendar_id': calendar_id,
-                'start_time': start_datetime.isoformat(),
-                'end_time': end_datetime.isoformat()
+                'start_time': event['start']['dateTime'],
+                'end_time': event['end']['dateTime']
             }
             
         except HttpError as e:
@@ -311,6 +374,61 @@ class MultiUserCalendarManager:
             logger.error(f"Error creating event for user {user_id}: {e}")
             raise
     
+    def create_user_events_batch(self, user_id: str, slots: List[Dict[str, str]], 
+                                event_details: Dict[str, Any], 
+                                calendar_id: str = None) -> List[Dict[str, Any]]:
+        """Create several calendar events for user with batched HTTP requests"""
+        try:
+            service = self._get_calendar_service(user_id)
+            
+            if not calendar_id:
+                calendar_id = self.get_primary_calendar_id(user_id)
+            
+            events = [self._build_event_body(slot['date'], slot['time'], event_details) for slot in slots]
+            results: List[Dict[str, Any]] = [None] * len(slots)
+            
+            def collect(request_id, response, exception):
+                index = int(request_id)
+                result = {
+                    'date': slots[index]['date'],
+                    'time': slots[index]['time'],
+                    'success': exception is None
+                }
+                
+                if exception is None:
+                    result.update({
+                        'event_id': response['id'],
+                        'event_link': response.get('htmlLink', ''),
+                        'calendar_id': calendar_id,
+                        'start_time': events[index]['start']['dateTime'],
+                        'end_time': events[index]['end']['dateTime']
+                    })
+                else:
+                    logger.error(f"Batch insert failed for user {user_id} at {result['date']} {result['time']}: {exception}")
+                    result['error'] = str(exception)
+                
+                results[index] = result
+            
+            # The Calendar batch endpoint accepts at most 50 requests per call
+            for batch_start in range(0, len(events), 50):
+                batch = service.new_batch_http_request(callback=collect)
+                for index in range(batch_start, min(batch_start + 50, len(events))):
+                    batch.add(
+                        service.events().insert(calendarId=calendar_id, body=events[index]),
+                        request_id=str(index)
+                    )
+                batch.execute()
+            
+            logger.info(f"Batch created {sum(1 for r in results if r['success'])}/{len(slots)} events for user {user_id}")
+            return results
+            
+        except HttpError as e:
+            logger.error(f"HTTP error batch creating events for user {user_id}: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error batch creating events for user {user_id}: {e}")
+            raise
+    
     def update_user_event(self, user_id: str, event_id: str, 
                          updates: Dict[str, Any]) -> Dict[str, Any]:
         """Update existing calendar event"""
@@ -376,16 +494,15 @@ class MultiUserCalendarManager:
             logger.error(f"Error deleting event {event_id} for user {user_id}: {e}")
             return False
     
-    def get_user_upcoming_events(self, user_id: str, days_ahead: int = 7) -> List[Dict[str, Any]]:
+    def get_user_upcoming_events(self, user_id: str, days_ahead: int = 7,
+                                 max_results: int = None) -> List[Dict[str, Any]]:
         """Get upcoming events for user"""
         try:
             now = datetime.now(timezone_manager.get_current_timezone())
             future_date = now + timedelta(days=days_ahead)
             
-            events = self.get_user_events(user_id, now, future_date)
-            
-            # Sort by start time
-            events.sort(key=lambda x: x['start'])
+            # Already ordered by start time by the API (orderBy='startTime')
+            events = self.get_user_events(user_id, now, future_date, max_results=max_results)
             
             return events
             
@@ -4,9 +4,11 @@ Handles AI-powered booking conversations with user authentication
 """
 import logging
 import asyncio
-from datetime import datetime, timedelta
+import time
+from weakref import WeakValueDictionary
+from datetime import date, datetime, timedelta
 from typing import Dict, Any, Optional, List
-import pytz
+from zoneinfo import ZoneInfo
 import re
 
 from backend.google_auth_manager import google_auth_manager
@@ -16,13 +18,26 @@ from backend.timezone_manager import timezone_manager
 
 logger = logging.getLogger(__name__)
 
+# Display formats for upcoming events
+_EVENT_FMT = '%A, %B %d at %I:%M %p'
+_ALL_DAY_FMT = '%A, %B %d (All day)'
+
+# Commands answerable without a session, so users without one skip the auth check
+_NO_AUTH_NEEDED = frozenset({
+    'help', 'commands', 'hello', 'hi', 'hey', 'start',
+    'status', 'health', 'auth', 'authenticate', 'login', 'signin'
+})
+
 class SecureUserBookingAgent:
     """AI agent for secure, user-specific booking conversations"""
     
     def __init__(self):
-        self.conversation_history: Dict[str, List[Dict[str, str]]] = {}
+        self.conversation_history: Dict[str, List[Dict[str, Any]]] = {}
         self.user_contexts: Dict[str, Dict[str, Any]] = {}
         
+        # Per-user locks serialize one user's messages while users run concurrently
+        self._user_locks: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
+        
         # Response templates
         self.auth_required_message = """
 🔐 **Authentication Required**
@@ -62,85 +77,104 @@ I'm your AI-powered calendar assistant. I can help you:
 **Example:** "Book an appointment tomorrow at 2 PM"
 """
         
+        # Exact commands for unauthenticated users: static responses or callables
+        unauth_help = self._get_help_message(authenticated=False)
+        auth_instructions = self._get_auth_instructions()
+        self._unauth_dispatch = {
+            'help': unauth_help,
+            'commands': unauth_help,
+            'auth': auth_instructions,
+            'authenticate': auth_instructions,
+            'login': auth_instructions,
+            'signin': auth_instructions,
+            'status': self._get_system_status,
+            'health': self._get_system_status,
+            'hello': self.welcome_message,
+            'hi': self.welcome_message,
+            'hey': self.welcome_message,
+            'start': self.welcome_message
+        }
+        
         logger.info("Secure User Booking Agent initialized")
     
     async def process_user_message(self, message: str, user_id: str) -> str:
         """Process user message with authentication awareness"""
-        try:
-            # Initialize user context if needed
-            if user_id not in self.user_contexts:
-                self.user_contexts[user_id] = {
-                    'authenticated': False,
-                    'last_activity': datetime.now(),
-                    'preferences': {}
-                }
-            
-            # Update last activity
-            self.user_contexts[user_id]['last_activity'] = datetime.now()
-            
-            # Check authentication status
-            is_authenticated = google_auth_manager.is_user_authenticated(user_id)
-            self.user_contexts[user_id]['authenticated'] = is_authenticated
-            
-            # Add to conversation history
-            self._add_to_conversation(user_id, 'user', message)
-            
-            # Process message based on authentication status
-            if is_authenticated:
-                response = await self._process_authenticated_message(message, user_id)
-            else:
-                response = await self._process_unauthenticated_message(message, user_id)
-            
-            # Add response to conversation history
-            self._add_to_conversation(user_id, 'assistant', response)
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error processing message for user {user_id}: {e}")
-            return f"❌ I encountered an error processing your request: {str(e)}"
+        async with self._user_lock(user_id):
+            try:
+                # Initialize user context if needed
+                if user_id not in self.user_contexts:
+                    self.user_contexts[user_id] = {
+                        'authenticated': False,
+                        'preferences': {}
+                    }
+                
+                # Update last activity (monotonic seconds, only used for idle expiry)
+                self.user_contexts[user_id]['last_activity'] = time.monotonic()
+                
+                # Add to conversation history
+                self._add_to_conversation(user_id, 'user', message)
+                
+                message_lower = message.lower().strip()
+                
+                # Check authentication status (writes the session file) off the event loop
+                if message_lower in _NO_AUTH_NEEDED and not google_auth_manager.has_active_session(user_id):
+                    is_authenticated = False
+                else:
+                    is_authenticated = await asyncio.to_thread(google_auth_manager.is_user_authenticated, user_id)
+                self.user_contexts[user_id]['authenticated'] = is_authenticated
+                
+                # Process message based on authentication status
+                if is_authenticated:
+                    response = await self._process_authenticated_message(message, message_lower, user_id)
+                else:
+                    response = await self._process_unauthenticated_message(message, message_lower, user_id)
+                
+                # Add response to conversation history
+                self._add_to_conversation(user_id, 'assistant', response)
+                
+                return response
+                
+            except Exception as e:
+                logger.error(f"Error processing message for user {user_id}: {e}")
+                return f"❌ I encountered an error processing your request: {str(e)}"
+    
+    def _user_lock(self, user_id: str) -> asyncio.Lock:
+        """Get the lock guarding a user's context and conversation history"""
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[user_id] = lock
+        return lock
     
     def _add_to_conversation(self, user_id: str, role: str, content: str):
         """Add message to conversation history"""
         if user_id not in self.conversation_history:
             self.conversation_history[user_id] = []
         
+        # Integer epoch nanoseconds, cheaper to record than an ISO string
         self.conversation_history[user_id].append({
             'role': role,
             'content': content,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': time.time_ns()
         })
         
         # Keep only last 20 messages
         if len(self.conversation_history[user_id]) > 20:
             self.conversation_history[user_id] = self.conversation_history[user_id][-20:]
     
-    async def _process_unauthenticated_message(self, message: str, user_id: str) -> str:
+    async def _process_unauthenticated_message(self, message: str, message_lower: str, user_id: str) -> str:
         """Process message for unauthenticated user"""
-        message_lower = message.lower().strip()
-        
-        if message_lower in ['help', 'commands']:
-            return self._get_help_message(authenticated=False)
+        handler = self._unauth_dispatch.get(message_lower)
+        if handler is not None:
+            return handler() if callable(handler) else handler
         
-        elif message_lower in ['auth', 'authenticate', 'login', 'signin']:
-            return self._get_auth_instructions()
-        
-        elif message_lower in ['status', 'health']:
-            return self._get_system_status()
-        
-        elif message_lower in ['hello', 'hi', 'hey', 'start']:
-            return self.welcome_message
-        
-        elif any(keyword in message_lower for keyword in ['book', 'schedule', 'appointment', 'meeting']):
+        if any(keyword in message_lower for keyword in ['book', 'schedule', 'appointment', 'meeting']):
             return self.auth_required_message + "\n\n💡 **Tip:** Use the `auth` command to get started!"
         
-        else:
-            return self.auth_required_message
+        return self.auth_required_message
     
-    async def _process_authenticated_message(self, message: str, user_id: str) -> str:
+    async def _process_authenticated_message(self, message: str, message_lower: str, user_id: str) -> str:
         """Process message for authenticated user"""
-        message_lower = message.lower().strip()
-        
         try:
             # Get user info
             user_info = google_auth_manager.get_user_info(user_id)
@@ -169,7 +203,7 @@ I'm your AI-powered calendar assistant. I can help you:
             
             else:
                 # Try to parse as natural language booking request
-                return await self._handle_natural_language_request(message, user_id)
+                return await self._handle_natural_language_request(message, message_lower, user_id)
                 
         except Exception as e:
             logger.error(f"Error processing authenticated message for user {user_id}: {e}")
@@ -178,8 +212,11 @@ I'm your AI-powered calendar assistant. I can help you:
     async def _handle_booking_request(self, message: str, user_id: str) -> str:
         """Handle booking appointment request"""
         try:
-            # Parse date and time from message
-            parsed_result = advanced_parser.parse_datetime_from_text(message)
+            # Parse date and time from message while the primary calendar is resolved
+            parsed_result, calendar_id = await asyncio.gather(
+                asyncio.to_thread(advanced_parser.parse_datetime_from_text, message),
+                asyncio.to_thread(multi_user_calendar_manager.get_primary_calendar_id, user_id)
+            )
             
             if not parsed_result['success']:
                 return """
@@ -199,7 +236,23 @@ Please specify when you'd like to book the appointment.
             time_str = parsed_result['time']
             
             # Check availability first
-            available_slots = multi_user_calendar_manager.get_user_availability(user_id, date_str)
+            available_slots = await asyncio.to_thread(
+                multi_user_calendar_manager.get_user_availability,
+                user_id, date_str, calendar_id=calendar_id
+            )
+            
+            # Create appointment
+            appointment_details = {
+                'title': 'TailorTalk Appointment',
+                'description': 'Appointment booked via TailorTalk Enhanced',
+                'duration': 60
+            }
+            
+            # Several times in one message are booked with a single batched request
+            if len(parsed_result['slots']) > 1:
+                return await self._handle_batch_booking(
+                    user_id, parsed_result['slots'], available_slots, appointment_details, calendar_id
+                )
             
             if time_str not in available_slots:
                 return f"""
@@ -213,15 +266,9 @@ The requested time {time_str} on {date_str} is not available.
 Please choose an available time or try a different date.
 """
             
-            # Create appointment
-            appointment_details = {
-                'title': 'TailorTalk Appointment',
-                'description': 'Appointment booked via TailorTalk Enhanced',
-                'duration': 60
-            }
-            
-            booking_result = multi_user_calendar_manager.create_user_event(
-                user_id, date_str, time_str, appointment_details
+            booking_result = await asyncio.to_thread(
+                multi_user_calendar_manager.create_user_event,
+                user_id, date_str, time_str, appointment_details, calendar_id=calendar_id
             )
             
             return f"""
@@ -239,24 +286,84 @@ Your appointment has been added to your Google Calendar. You'll receive a notifi
             logger.error(f"Error handling booking request for user {user_id}: {e}")
             return f"❌ Failed to book appointment: {str(e)}"
     
+    async def _handle_batch_booking(self, user_id: str, slots: List[Dict[str, str]], 
+                                    available_slots: List[str], appointment_details: Dict[str, Any], 
+                                    calendar_id: str) -> str:
+        """Book several requested slots on one date"""
+        duration = appointment_details.get('duration', 60)
+        bookable = []
+        unavailable = []
+        accepted_starts = []
+        
+        # Free slots can still overlap each other, so each accepted slot blocks its own window
+        for slot in slots:
+            hour, minute = map(int, slot['time'].split(':'))
+            start = hour * 60 + minute
+            if slot['time'] in available_slots and all(abs(start - other) >= duration for other in accepted_starts):
+                bookable.append(slot)
+                accepted_starts.append(start)
+            else:
+                unavailable.append(slot['time'])
+        date_str = slots[0]['date']
+        
+        if not bookable:
+            return f"""
+⚠️ **None of the requested times are available**
+
+Requested: {', '.join(unavailable)} on {date_str}
+
+**Available slots for {date_str}:**
+{', '.join(available_slots) if available_slots else 'No available slots'}
+
+Please choose available times or try a different date.
+"""
+        
+        booking_results = await asyncio.to_thread(
+            multi_user_calendar_manager.create_user_events_batch,
+            user_id, bookable, appointment_details, calendar_id
+        )
+        
+        booked_text = "\n".join(
+            f"• ✅ {result['time']} - {result.get('event_link') or 'Available in your calendar'}"
+            if result['success'] else f"• ❌ {result['time']} - {result.get('error', 'Booking failed')}"
+            for result in booking_results
+        )
+        unavailable_text = f"\n\n⚠️ **Not available:** {', '.join(unavailable)}" if unavailable else ""
+        
+        return f"""
+📅 **Booked {sum(1 for r in booking_results if r['success'])} of {len(slots)} appointments on {date_str}**
+
+{booked_text}{unavailable_text}
+
+⏱️ **Duration:** 1 hour each
+
+Your appointments have been added to your Google Calendar.
+"""
+    
     async def _handle_availability_request(self, message: str, user_id: str) -> str:
         """Handle availability check request"""
         try:
-            # Parse date from message
-            parsed_result = advanced_parser.parse_datetime_from_text(message)
+            # Parse date from message while the primary calendar is resolved
+            parsed_result, calendar_id = await asyncio.gather(
+                asyncio.to_thread(advanced_parser.parse_datetime_from_text, message),
+                asyncio.to_thread(multi_user_calendar_manager.get_primary_calendar_id, user_id)
+            )
             
-            if not parsed_result['success']:
-                # Default to today
-                today = datetime.now().strftime('%Y-%m-%d')
-                date_str = today
-            else:
+            # A date alone is enough here; success also requires a time
+            if parsed_result['date']:
                 date_str = parsed_result['date']
+            else:
+                # Default to today
+                date_str = datetime.now().strftime('%Y-%m-%d')
             
             # Get availability
-            available_slots = multi_user_calendar_manager.get_user_availability(user_id, date_str)
+            available_slots = await asyncio.to_thread(
+                multi_user_calendar_manager.get_user_availability,
+                user_id, date_str, calendar_id=calendar_id
+            )
             
             if available_slots:
-                slots_text = '\n'.join([f"• {slot}" for slot in available_slots])
+                slots_text = '\n'.join(f"• {slot}" for slot in available_slots)
                 return f"""
 📅 **Available slots for {date_str}:**
 
@@ -285,7 +392,9 @@ Try checking a different date or contact support for assistance.
     async def _handle_upcoming_events(self, user_id: str) -> str:
         """Handle upcoming events request"""
         try:
-            upcoming_events = multi_user_calendar_manager.get_user_upcoming_events(user_id, 7)
+            upcoming_events = await asyncio.to_thread(
+                multi_user_calendar_manager.get_user_upcoming_events, user_id, 7, max_results=10
+            )
             
             if not upcoming_events:
                 return """
@@ -296,10 +405,10 @@ You have no events scheduled for the next 7 days.
 Would you like to book an appointment? Just say "book [date] [time]"
 """
             
-            events_text = ""
-            for event in upcoming_events[:10]:  # Show max 10 events
-                start_time = self._format_event_time(event['start'])
-                events_text += f"• **{event['summary']}** - {start_time}\n"
+            events_text = "\n".join(
+                f"• **{event['summary']}** - {self._format_event_time(event['start'])}"
+                for event in upcoming_events
+            ) + "\n"
             
             return f"""
 📅 **Your upcoming events:**
@@ -345,12 +454,10 @@ Thank you for using TailorTalk Enhanced!
             logger.error(f"Error handling logout for user {user_id}: {e}")
             return f"❌ Error during logout: {str(e)}"
     
-    async def _handle_natural_language_request(self, message: str, user_id: str) -> str:
+    async def _handle_natural_language_request(self, message: str, message_lower: str, user_id: str) -> str:
         """Handle natural language requests"""
         try:
             # Simple keyword-based processing
-            message_lower = message.lower()
-            
             if any(word in message_lower for word in ['when', 'what time', 'schedule']):
                 return await self._handle_upcoming_events(user_id)
             
@@ -465,7 +572,7 @@ To use TailorTalk's calendar features, you need to authenticate with your Google
         """Get system status information"""
         try:
             auth_status = google_auth_manager.get_auth_status()
-            current_time = datetime.now(pytz.timezone('Asia/Kolkata'))
+            current_time = datetime.now(ZoneInfo('Asia/Kolkata'))
             
             return f"""
 🔧 **TailorTalk System Status**
@@ -527,15 +634,19 @@ Everything looks good! 🎉
     
     def _format_event_time(self, datetime_str: str) -> str:
         """Format event datetime for display"""
+        if 'T' in datetime_str:
+            # Python 3.11+ fromisoformat accepts the trailing 'Z' directly
+            try:
+                dt = datetime.fromisoformat(datetime_str)
+            except ValueError:
+                return datetime_str
+            return dt.strftime(_EVENT_FMT)
+        
         try:
-            if 'T' in datetime_str:
-                dt = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-                return dt.strftime('%A, %B %d at %I:%M %p')
-            else:
-                date_obj = datetime.strptime(datetime_str, '%Y-%m-%d')
-                return date_obj.strftime('%A, %B %d (All day)')
-        except:
+            event_date = date.fromisoformat(datetime_str)
+        except ValueError:
             return datetime_str
+        return event_date.strftime(_ALL_DAY_FMT)
 
 # Global secure user booking agent
 secure_user_booking_agent = SecureUserBookingAgent()
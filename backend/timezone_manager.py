@@ -1,18 +1,41 @@
 """
 Advanced timezone management for TailorTalk
 """
-import pytz
+import re
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Availability masks: one bit per 15-minute slot of the day (bit 0 = 00:00)
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+def slot_of(dt: datetime) -> int:
+    """Get the 15-minute slot index of a datetime's wall-clock time"""
+    return (dt.hour * 60 + dt.minute) // SLOT_MINUTES
+
+def interval_mask(start_minute: int, end_minute: int) -> int:
+    """Get a slot mask covering [start_minute, end_minute) of the day"""
+    start_slot = max(start_minute, 0) // SLOT_MINUTES
+    end_slot = min(-(-end_minute // SLOT_MINUTES), SLOTS_PER_DAY)
+    if end_slot <= start_slot:
+        return 0
+    return (1 << end_slot) - (1 << start_slot)
+
+@lru_cache(maxsize=1)
+def _zone_names_by_lower() -> Dict[str, str]:
+    """Map lowercased IANA zone names to their canonical spelling"""
+    return {name.lower(): name for name in available_timezones()}
+
 class TimezoneManager:
     """Advanced timezone handling and conversion"""
     
     def __init__(self, default_timezone: str = 'Asia/Kolkata'):
-        self.default_timezone = pytz.timezone(default_timezone)
+        self.default_timezone = ZoneInfo(default_timezone)
         self.current_timezone = self.default_timezone
         
         # Common timezone mappings
@@ -28,6 +51,13 @@ class TimezoneManager:
             'cet': 'Europe/Paris',
             'aest': 'Australia/Sydney'
         }
+        
+        # One capture group per alias so match.lastindex selects the resolved timezone
+        self._alias_re = re.compile(
+            r'^\s*(?:' + '|'.join(f'({re.escape(alias)})' for alias in self.timezone_aliases) + r')\s*$',
+            re.IGNORECASE
+        )
+        self._alias_timezones = tuple(ZoneInfo(name) for name in self.timezone_aliases.values())
     
     def set_timezone(self, timezone_str: str):
         """Set the current timezone"""
@@ -38,24 +68,30 @@ class TimezoneManager:
             logger.error(f"Failed to set timezone {timezone_str}: {e}")
             self.current_timezone = self.default_timezone
     
-    def get_current_timezone(self) -> pytz.BaseTzInfo:
+    def get_current_timezone(self) -> ZoneInfo:
         """Get the current timezone"""
         return self.current_timezone
     
-    def parse_timezone(self, timezone_input: str) -> pytz.BaseTzInfo:
+    def parse_timezone(self, timezone_input: str) -> ZoneInfo:
         """Parse timezone from various input formats"""
         if not timezone_input:
             return self.default_timezone
         
-        timezone_input = timezone_input.lower().strip()
-        
         # Check aliases first
-        if timezone_input in self.timezone_aliases:
-            timezone_input = self.timezone_aliases[timezone_input]
+        alias_match = self._alias_re.match(timezone_input)
+        if alias_match:
+            return self._alias_timezones[alias_match.lastindex - 1]
+        
+        timezone_input = timezone_input.strip()
         
         try:
-            return pytz.timezone(timezone_input)
-        except pytz.exceptions.UnknownTimeZoneError:
+            return ZoneInfo(timezone_input)
+        except (ZoneInfoNotFoundError, ValueError):
+            # zoneinfo keys are case-sensitive; accept e.g. 'asia/tokyo' as before
+            zone_name = _zone_names_by_lower().get(timezone_input.lower())
+            if zone_name:
+                return ZoneInfo(zone_name)
+            
             logger.warning(f"Unknown timezone: {timezone_input}, using default")
             return self.default_timezone
     
@@ -67,7 +103,7 @@ class TimezoneManager:
             
             # Localize if naive
             if dt.tzinfo is None:
-                dt = from_timezone.localize(dt)
+                dt = dt.replace(tzinfo=from_timezone)
             
             # Convert to target timezone
             return dt.astimezone(to_timezone)
@@ -80,16 +116,20 @@ class TimezoneManager:
         """Get business hours for a timezone (9 AM to 6 PM local time)"""
         return (9, 18)  # Can be customized per timezone
     
+    def get_business_mask(self, timezone_str: str) -> int:
+        """Get business hours as a 15-minute slot mask"""
+        start_hour, end_hour = self.get_business_hours(timezone_str)
+        return interval_mask(start_hour * 60, end_hour * 60)
+    
     def is_business_hours(self, dt: datetime, timezone_str: str) -> bool:
         """Check if datetime is within business hours"""
         try:
             tz = self.parse_timezone(timezone_str)
             local_dt = dt.astimezone(tz)
-            start_hour, end_hour = self.get_business_hours(timezone_str)
             
             # Check if it's a weekday and within business hours
             is_weekday = local_dt.weekday() < 5  # Monday = 0, Sunday = 6
-            is_business_time = start_hour <= local_dt.hour < end_hour
+            is_business_time = bool((self.get_business_mask(timezone_str) >> slot_of(local_dt)) & 1)
             
             return is_weekday and is_business_time
             
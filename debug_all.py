@@ -0,0 +1,72 @@
+"""
+Run every TailorTalk debug check in one process, overlapping the network probes
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import io
+import sys
+
+import debug_calendar
+import debug_openai_key
+import fix_timezone_issue
+import force_reload_env
+
+CHECK_NAMES = ("Calendar Integration", "OpenAI Key", "Timezone", "Environment Reload")
+
+# The running check's output buffer; each gather task and its to_thread worker see their own
+_check_output = contextvars.ContextVar('_check_output', default=None)
+
+class _CheckStdout(io.TextIOBase):
+    """Stdout that writes into the current check's buffer, or through to stream outside a check"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+    
+    def write(self, text):
+        buffer = _check_output.get()
+        return (buffer if buffer is not None else self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+async def _captured(start_check):
+    """Run one check with its own output buffer; returns (result or exception, output)"""
+    buffer = io.StringIO()
+    _check_output.set(buffer)
+    try:
+        result = await start_check()
+    except Exception as e:
+        result = e
+    return result, buffer.getvalue()
+
+async def run_all_checks():
+    """Run the calendar, OpenAI, timezone and env checks concurrently"""
+    # redirect_stdout swaps the process-wide stream, so the proxy routes per check instead
+    with contextlib.redirect_stdout(_CheckStdout(sys.stdout)):
+        return await asyncio.gather(
+            _captured(debug_calendar.test_calendar_integration),
+            _captured(lambda: asyncio.to_thread(debug_openai_key.main)),
+            _captured(lambda: asyncio.to_thread(fix_timezone_issue.main)),
+            _captured(lambda: asyncio.to_thread(force_reload_env.force_reload_environment))
+        )
+
+if __name__ == "__main__":
+    print("🚀 TailorTalk Debug Suite")
+    print("=" * 60)
+    
+    outcomes = asyncio.run(run_all_checks())
+    
+    # Each check's output is printed as one block once every check has finished
+    for name, (_, output) in zip(CHECK_NAMES, outcomes):
+        print(f"\n▶ {name}")
+        print("-" * 60)
+        print(output, end="")
+    
+    print("\n📊 RESULTS:")
+    for name, (result, _) in zip(CHECK_NAMES, outcomes):
+        if isinstance(result, Exception):
+            print(f"{name}: ❌ Crashed ({result})")
+        else:
+            print(f"{name}: {'✅ Working' if result else '❌ Failed'}")
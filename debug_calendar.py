@@ -2,14 +2,32 @@
 Debug script to test Google Calendar integration
 """
 
-import os
-from datetime import datetime, timedelta
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, time
+from functools import lru_cache
 import pytz
-from dotenv import load_dotenv
+from _calendar_cache import get_cached_events, get_events_cached, store_events
+from _debug_config import load_cfg
 
-load_dotenv()
+_cfg = load_cfg()
 
-def test_calendar_integration():
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _tz(name):
+    """Return a cached pytz timezone for name"""
+    return pytz.timezone(name)
+
+# Upper bound on concurrent per-day scans when the batch endpoint is unavailable
+MAX_DAY_SCAN_WORKERS = 8
+
+# Per-message bound for the AI agent probes
+MESSAGE_TIMEOUT_SECONDS = 15
+
+async def test_calendar_integration():
     """Test the calendar integration with detailed debugging"""
     print("🔍 Testing Google Calendar Integration")
     print("=" * 50)
@@ -21,33 +39,91 @@ def test_calendar_integration():
         print("✅ Calendar manager initialized")
         
         # Test today's availability
-        timezone = pytz.timezone(os.getenv('TIMEZONE', 'Asia/Kolkata'))
-        today = datetime.now(timezone).date().strftime('%Y-%m-%d')
-        tomorrow = (datetime.now(timezone) + timedelta(days=1)).date().strftime('%Y-%m-%d')
+        timezone = _tz(_cfg.timezone)
+        now = datetime.now(timezone)
+        today_date = now.date()
+        tomorrow_date = today_date + timedelta(days=1)
+        today = today_date.isoformat()
+        tomorrow = tomorrow_date.isoformat()
+        
+        # Fetch both days' events in one multipart batch round-trip
+        calendar_id = _cfg.calendar_id
+        day_dates = {'today': today_date, 'tomorrow': tomorrow_date}
+        day_windows = {}
+        for request_id, day in day_dates.items():
+            day_windows[request_id] = (
+                timezone.localize(datetime.combine(day, time.min)),
+                timezone.localize(datetime.combine(day, time(23, 59, 59))),
+                timezone.localize(datetime.combine(day, time(9))),
+                timezone.localize(datetime.combine(day, time(18)))
+            )
+        
+        # Days still in the short-lived event cache skip the API entirely
+        batch_results = {}
+        for request_id, day in day_dates.items():
+            cached_events = get_cached_events(calendar_id, day)
+            if cached_events is not None:
+                batch_results[request_id] = cached_events
+        missing = [request_id for request_id in day_dates if request_id not in batch_results]
+        
+        def _collect(request_id, response, exception):
+            if exception is not None:
+                raise exception
+            batch_results[request_id] = response.get('items', [])
+        
+        def list_day_request(day_start, day_end):
+            return calendar_manager.service.events().list(
+                calendarId=calendar_id,
+                timeMin=day_start.isoformat(),
+                timeMax=day_end.isoformat(),
+                singleEvents=True,
+                orderBy='startTime'
+            )
+        
+        def fetch_day_events():
+            batch = calendar_manager.service.new_batch_http_request(callback=_collect)
+            for request_id in missing:
+                day_start, day_end, _, _ = day_windows[request_id]
+                batch.add(list_day_request(day_start, day_end), request_id=request_id)
+            batch.execute()
+        
+        def fetch_single_day(request_id):
+            return request_id, get_events_cached(
+                calendar_manager.service, calendar_id, day_dates[request_id], timezone
+            )
+        
+        if missing:
+            try:
+                await asyncio.to_thread(fetch_day_events)
+            except Exception as e:
+                # Fall back to per-day requests on a bounded pool; each worker thread gets its own HTTP client
+                print(f"⚠️ Batch request failed ({e}), scanning days in parallel instead")
+                loop = asyncio.get_running_loop()
+                with ThreadPoolExecutor(max_workers=min(MAX_DAY_SCAN_WORKERS, len(missing))) as pool:
+                    day_results = await asyncio.gather(
+                        *(loop.run_in_executor(pool, fetch_single_day, request_id) for request_id in missing)
+                    )
+                batch_results.update(day_results)
+            
+            for request_id in missing:
+                store_events(calendar_id, day_dates[request_id], batch_results[request_id])
+        
+        # Free slots are computed client-side from the batched events
+        today_slots, tomorrow_slots = (
+            calendar_manager.available_slots_from_events(
+                batch_results[request_id], day_windows[request_id][2], day_windows[request_id][3]
+            )
+            for request_id in ('today', 'tomorrow')
+        )
         
         print(f"\n📅 Testing availability for today ({today}):")
-        today_slots = calendar_manager.get_availability(today)
         print(f"Available slots: {today_slots}")
         
         print(f"\n📅 Testing availability for tomorrow ({tomorrow}):")
-        tomorrow_slots = calendar_manager.get_availability(tomorrow)
         print(f"Available slots: {tomorrow_slots}")
         
-        # Test direct calendar access
         print(f"\n🔍 Testing direct calendar access:")
-        target_date = datetime.strptime(today, '%Y-%m-%d')
-        start_time = timezone.localize(target_date.replace(hour=0, minute=0, second=0))
-        end_time = timezone.localize(target_date.replace(hour=23, minute=59, second=59))
-        
-        events_result = calendar_manager.service.events().list(
-            calendarId=os.getenv('CALENDAR_ID', 'primary'),
-            timeMin=start_time.isoformat(),
-            timeMax=end_time.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
+        events = batch_results['today']
         print(f"📋 Found {len(events)} events for {today}:")
         
         for event in events:
@@ -62,13 +138,11 @@ def test_calendar_integration():
         
         return True
         
-    except Exception as e:
-        print(f"❌ Error testing calendar: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Error testing calendar")
         return False
 
-def test_ai_agent():
+async def test_ai_agent():
     """Test the AI agent"""
     print("\n🤖 Testing AI Agent")
     print("=" * 30)
@@ -86,29 +160,34 @@ def test_ai_agent():
             "Schedule a meeting for 3 PM tomorrow"
         ]
         
-        for message in test_messages:
+        # Each message is time-bounded; a stall or failure cancels its siblings
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(asyncio.wait_for(agent.process_message(message), timeout=MESSAGE_TIMEOUT_SECONDS))
+                for message in test_messages
+            ]
+        
+        for message, task in zip(test_messages, tasks):
             print(f"\n📨 Testing message: '{message}'")
-            try:
-                import asyncio
-                response = asyncio.run(agent.process_message(message))
-                print(f"🤖 Response: {response[:100]}...")
-            except Exception as e:
-                print(f"❌ Error processing message: {e}")
+            print(f"🤖 Response: {task.result()[:100]}...")
         
         return True
         
-    except Exception as e:
-        print(f"❌ Error testing AI agent: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Error testing AI agent")
         return False
 
+async def run_all_tests():
+    """Run every debug test on a single event loop"""
+    calendar_ok = await test_calendar_integration()
+    ai_ok = await test_ai_agent()
+    return calendar_ok, ai_ok
+
 if __name__ == "__main__":
     print("🚀 TailorTalk Debug Script")
     print("=" * 60)
     
-    calendar_ok = test_calendar_integration()
-    ai_ok = test_ai_agent()
+    calendar_ok, ai_ok = asyncio.run(run_all_tests())
     
     print(f"\n📊 RESULTS:")
     print(f"📅 Calendar Integration: {'✅ Working' if calendar_ok else '❌ Failed'}")
@@ -2,43 +2,42 @@
 Quick fix script for timezone-related calendar issues
 """
 import os
+import stat
 import sys
+import tempfile
 from datetime import datetime
+from functools import lru_cache
 import pytz
-from dotenv import load_dotenv
+from _debug_config import load_cfg
+
+@lru_cache(maxsize=None)
+def _tz(name):
+    """Return a cached pytz timezone for name"""
+    return pytz.timezone(name)
+
+_cfg = load_cfg()
 
 def fix_timezone_issue():
     """Fix common timezone-related issues"""
     print("🔧 TailorTalk Timezone Fix")
     print("=" * 30)
     
-    # Load environment
-    load_dotenv()
-    
     # Check timezone setting
-    timezone_str = os.getenv('TIMEZONE', 'Asia/Kolkata')
+    timezone_str = _cfg.timezone
     print(f"📍 Configured timezone: {timezone_str}")
     
     try:
         # Test timezone
-        tz = pytz.timezone(timezone_str)
+        tz = _tz(timezone_str)
         current_time = datetime.now(tz)
         print(f"🕐 Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
         
         # Test datetime creation
-        test_date = "2025-07-05"
-        test_time = "15:00"
-        
-        # Parse date and time
-        date_obj = datetime.strptime(test_date, '%Y-%m-%d').date()
-        time_obj = datetime.strptime(test_time, '%H:%M').time()
-        
-        # Combine and localize
-        naive_datetime = datetime.combine(date_obj, time_obj)
+        naive_datetime = datetime(2025, 7, 5, 15, 0)
         aware_datetime = tz.localize(naive_datetime)
         
         print(f"✅ Test datetime creation successful:")
-        print(f"   Input: {test_date} {test_time}")
+        print(f"   Input: {naive_datetime.strftime('%Y-%m-%d %H:%M')}")
         print(f"   Output: {aware_datetime.isoformat()}")
         
         return True
@@ -58,42 +57,61 @@ def update_env_file():
     print("\n📝 Updating .env file...")
     
     # Read existing .env
-    env_content = ""
+    lines = []
     if os.path.exists('.env'):
         with open('.env', 'r') as f:
-            env_content = f.read()
+            lines = f.read().split('\n')
+    
+    # Index existing keys by their parsed name so e.g. MY_TIMEZONE never matches TIMEZONE
+    seen = {}
+    for i, line in enumerate(lines):
+        if '=' in line and not line.lstrip().startswith('#'):
+            seen.setdefault(line.split('=', 1)[0].strip(), i)
     
     # Update or add settings
     for key, value in env_updates.items():
-        if f"{key}=" in env_content:
-            # Update existing
-            lines = env_content.split('\n')
-            for i, line in enumerate(lines):
-                if line.startswith(f"{key}="):
-                    lines[i] = f"{key}={value}"
-            env_content = '\n'.join(lines)
+        if key in seen:
+            lines[seen[key]] = f"{key}={value}"
         else:
-            # Add new
-            env_content += f"\n{key}={value}"
+            lines.append(f"{key}={value}")
     
-    # Write updated .env
-    with open('.env', 'w') as f:
-        f.write(env_content)
+    # Write updated .env atomically so an interrupted run never leaves it truncated
+    env_dir = os.path.dirname(os.path.abspath('.env'))
+    with tempfile.NamedTemporaryFile('w', dir=env_dir, delete=False, prefix='.env.', suffix='.tmp') as tmp:
+        try:
+            tmp.write('\n'.join(lines))
+            tmp.flush()
+            os.fsync(tmp.fileno())
+            # Temp files are created 0600; keep the permissions the existing .env had
+            if os.path.exists('.env'):
+                os.chmod(tmp.name, stat.S_IMODE(os.stat('.env').st_mode))
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, '.env')
     
     print("✅ .env file updated")
 
-if __name__ == "__main__":
+def main():
+    """Check the timezone setup, repairing .env if needed"""
+    global _cfg
+    
     print("🚀 Running TailorTalk Timezone Fix...")
     
     # Fix timezone issue
-    if fix_timezone_issue():
+    fixed = fix_timezone_issue()
+    if fixed:
         print("✅ Timezone configuration is working correctly")
     else:
         print("❌ Timezone issue detected - updating configuration...")
         update_env_file()
+        # The rewritten .env must win over the values loaded at startup
+        _cfg = load_cfg(override=True)
         
         # Test again
-        if fix_timezone_issue():
+        fixed = fix_timezone_issue()
+        if fixed:
             print("✅ Timezone issue fixed!")
         else:
             print("❌ Unable to fix timezone issue automatically")
@@ -103,3 +121,8 @@ if __name__ == "__main__":
     print("1. Run: python test_calendar_connection.py")
     print("2. Start the server: python main_with_ai.py")
     print("3. Test booking: 'Book appointment on 5th July at 15:00'")
+    
+    return fixed
+
+if __name__ == "__main__":
+    main()
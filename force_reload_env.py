@@ -4,6 +4,7 @@ Force reload environment variables and test
 
 import os
 import sys
+import asyncio
 from dotenv import load_dotenv
 
 def force_reload_environment():
@@ -28,6 +29,22 @@ def force_reload_environment():
         print("❌ Still no API key found")
         return None
 
+async def _probe_chat_completion(api_key):
+    """Send a minimal chat completion over a pooled async HTTP client"""
+    import httpx
+    from openai import AsyncOpenAI
+    
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=10),
+        timeout=10.0
+    ) as http_client:
+        client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+        return await client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": "Hello"}],
+            max_tokens=5
+        )
+
 def test_with_new_key():
     """Test the newly loaded key"""
     api_key = force_reload_environment()
@@ -37,16 +54,8 @@ def test_with_new_key():
         return
     
     try:
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=api_key)
-        
         print("🧪 Testing with OpenAI client...")
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": "Hello"}],
-            max_tokens=5
-        )
+        response = asyncio.run(_probe_chat_completion(api_key))
         
         print("✅ OpenAI API test successful!")
         print(f"Response: {response.choices[0].message.content}")
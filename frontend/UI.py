@@ -1,42 +1,160 @@
 import streamlit as st
 import requests
-import json
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import re
 from datetime import datetime, timedelta
 import time
-import pytz
+import uuid
+from zoneinfo import ZoneInfo
 import asyncio
-import threading
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Final, List, Optional
 
-def initialize_session_state():
-    """Initialize session state variables"""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "api_url" not in st.session_state:
-        st.session_state.api_url = "http://127.0.0.1:8001"
-    if "availability_data" not in st.session_state:
-        st.session_state.availability_data = {}
-    if "last_availability_check" not in st.session_state:
-        st.session_state.last_availability_check = None
-    if "auto_refresh" not in st.session_state:
-        st.session_state.auto_refresh = True
-    if "system_status" not in st.session_state:
-        st.session_state.system_status = None
-    if "enhanced_features" not in st.session_state:
-        st.session_state.enhanced_features = {}
+# orjson is optional; the stdlib shim keeps the same bytes-in/bytes-out interface
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+    
+    _json_loads = json.loads
 
-def setup_page_config():
-    """Setup page configuration"""
-    st.set_page_config(
-        page_title="TailorTalk Enhanced - AI Booking Assistant",
-        page_icon="🚀",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
+# streamlit-autorefresh drives a browser-side rerun timer where fragments are unavailable
+try:
+    from streamlit_autorefresh import st_autorefresh
+except ImportError:
+    st_autorefresh = None
 
-def apply_custom_css():
-    """Apply enhanced custom CSS styles"""
-    st.markdown("""
+_IST = ZoneInfo('Asia/Kolkata')
+
+# Substring match, so 'booked' and 'appointments' still count as booking-related
+_BOOKING_RE = re.compile(r'book|schedule|available|appointment', re.IGNORECASE)
+_OK_STATUS_RE = re.compile(r'configured|connected|ready|available')
+
+# Only the newest messages are drawn individually; older ones sit behind an expander
+MAX_RENDERED_MESSAGES = 50
+
+# Availability responses are reused for this long across reruns and buttons
+AVAILABILITY_CACHE_TTL = 20
+
+# A cached call that returns faster than this is counted as a cache hit
+CACHE_HIT_THRESHOLD_MS = 1.0
+
+# Per-session caps; the oldest chat messages and tracked dates are dropped first
+MAX_STORED_MESSAGES = 200
+MAX_TRACKED_DATES = 30
+
+# Tracked dates other than the selected one refresh this many times less often
+UNSELECTED_REFRESH_MULTIPLIER = 5
+
+# "HH:MM" -> "hh:mm AM/PM" for every minute of the day, built once at import
+_SLOT_LABELS: Final = {
+    f"{h:02d}:{m:02d}": f"{(h - 1) % 12 + 1:02d}:{m:02d} {'AM' if h < 12 else 'PM'}"
+    for h in range(24) for m in range(60)
+}
+
+@st.cache_resource(show_spinner=False)
+def _availability_cache_store() -> Dict[tuple, tuple]:
+    """Process-wide availability cache that survives script reruns"""
+    return {}
+
+# (api_url, date_str, use_realtime) -> (fetched_at, data)
+_avail_cache = _availability_cache_store()
+
+_FEATURES_INFO: Final = (
+    ("🎯 Precise Date Parsing", "Handles '5th July', '4th August 3:30pm', etc."),
+    ("🔄 Real-time Updates", "Availability updates every 30 seconds"),
+    ("🤖 Smart Conversations", "Context-aware multi-turn dialogues"),
+    ("📅 Enhanced Calendar", "Advanced Google Calendar integration"),
+    ("⚡ Instant Booking", "Direct calendar event creation"),
+    ("🛡️ Error Recovery", "Robust error handling and fallbacks")
+)
+
+# Sidebar badge for the backend's active agent, shown after a connection test
+_AGENT_STATUS_BADGES: Final = {
+    'enhanced': '<span class="agent-badge agent-enhanced">🎯 Enhanced Agent</span>',
+    'openai': '<span class="agent-badge agent-openai">🤖 OpenAI Agent</span>',
+    'fallback': '<span class="agent-badge agent-fallback">🔄 Fallback Agent</span>'
+}
+
+_AGENT_BADGES: Final = {
+    'enhanced': '<span class="agent-badge agent-enhanced">Enhanced</span>',
+    'openai': '<span class="agent-badge agent-openai">OpenAI</span>',
+    'fallback': '<span class="agent-badge agent-fallback">Fallback</span>'
+}
+
+# (button label, message sent, help text) for the example prompt grid
+_EXAMPLES: Final = (
+    ("📅 Book tomorrow afternoon", "Book appointment on tomorrow afternoon", "Book appointment for tomorrow afternoon"),
+    ("🕐 Check Friday availability", "Check Friday availability", "Check what's available this Friday"),
+    ("📞 Book next week", "Book a meeting for next week", "Schedule something for next week"),
+    ("🌅 Morning meeting", "Schedule a meeting for tomorrow morning at 10 AM", "Schedule a morning meeting"),
+    ("📋 Check today's schedule", "What's my availability for today?", "See today's availability"),
+    ("👋 Say hello", "Hello! How can you help me with scheduling?", "Greet TailorTalk"),
+    ("📅 5th July 3:30pm", "Book appointment on 5th July at 3:30pm", "Test precise date/time parsing"),
+    ("📅 4th August 15:00", "Schedule meeting for 4th August at 15:00", "Test 24-hour format"),
+    ("📅 Next Monday morning", "Book appointment for next Monday morning", "Test relative date parsing")
+)
+
+# Static help text posted by the Enhanced Help button
+_HELP_MESSAGE: Final = """
+            **🚀 TailorTalk Enhanced Help:**
+            
+            **Enhanced Features:**
+            • **Precise Parsing**: "5th July at 3:30pm", "4th August 15:00"
+            • **Real-time Updates**: Availability refreshes automatically
+            • **Smart Conversations**: Context-aware responses
+            • **Multiple Agents**: Enhanced, OpenAI, and Fallback modes
+            
+            **Booking Examples:**
+            • "Book appointment on 5th July at 3:30pm"
+            • "Schedule meeting for August 4th at 15:00"
+            • "Book for tomorrow at 2 PM"
+            • "Show me availability for next Monday"
+            
+            **Date Formats Supported:**
+            • Specific: "5th July", "August 4th", "July 5th"
+            • Relative: "tomorrow", "next Monday", "next week"
+            • Numeric: "2025-07-05", "5/7/2025"
+            
+            **Time Formats Supported:**
+            • 12-hour: "3:30pm", "11:45am"
+            • 24-hour: "15:00", "09:30"
+            • Relative: "morning", "afternoon", "evening"
+            
+            **Real-time Features:**
+            • Auto-refresh availability every 30 seconds
+            • Live status indicators
+            • Instant booking confirmations
+            """
+
+# Static footer markup
+_FOOTER_HTML: Final = """
+    <div style="text-align: center; color: #666; font-size: 0.9em;">
+        <p>🚀 <strong>TailorTalk Enhanced AI Booking Assistant</strong></p>
+        <p>Powered by Enhanced AI Agents, Precise Date/Time Parsing, Real-time Calendar Integration</p>
+        <p>Built with FastAPI, Streamlit, Google Calendar API, and ❤️</p>
+        <p>✨ Features: Real-time Updates • Enhanced Parsing • Smart Conversations • Multiple AI Agents</p>
+    </div>
+    """
+
+# st.fragment graduated from st.experimental_fragment; older Streamlit has neither
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+def _minify_css(css: str) -> str:
+    """Collapse a <style> block's whitespace; Streamlit re-sends it on every rerun"""
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};])\s*', r'\1', css).strip()
+
+# Static stylesheet, minified once at import time
+_CUSTOM_CSS = _minify_css("""
     <style>
         .chat-message {
             padding: 1rem;
@@ -93,6 +211,11 @@ def apply_custom_css():
             justify-content: space-between;
             align-items: center;
         }
+        .availability-grid {
+            display: grid;
+            grid-template-columns: repeat(3, 1fr);
+            column-gap: 1rem;
+        }
         .slot-available {
             background-color: #e8f5e8;
             border-left: 4px solid #4caf50;
@@ -148,34 +271,200 @@ def apply_custom_css():
             color: white;
         }
     </style>
-    """, unsafe_allow_html=True)
+    """)
 
-def check_api_health():
-    """Check API health and return detailed status"""
+def create_http_session():
+    """Create a pooled, retrying HTTP session for API calls"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for concurrent API probes"""
+    return ThreadPoolExecutor(max_workers=8)
+
+def initialize_session_state():
+    """Initialize session state variables"""
+    if "http" not in st.session_state:
+        st.session_state.http = create_http_session()
+    if "user_id" not in st.session_state:
+        st.session_state.user_id = f"streamlit_user_{uuid.uuid4().hex[:12]}"
+    # One IST clock reading shared by every call site in this script run
+    st.session_state._now_ist = datetime.now(_IST)
+    st.session_state._ts = st.session_state._now_ist.strftime('%H:%M:%S')
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+    if "api_url" not in st.session_state:
+        st.session_state.api_url = "http://127.0.0.1:8001"
+    if "availability_data" not in st.session_state:
+        st.session_state.availability_data = {}
+    if "last_availability_check" not in st.session_state:
+        st.session_state.last_availability_check = None
+    if "selected_date" not in st.session_state:
+        st.session_state.selected_date = None
+    if "last_refresh_per_date" not in st.session_state:
+        st.session_state.last_refresh_per_date = {}
+    if "auto_refresh" not in st.session_state:
+        st.session_state.auto_refresh = True
+    if "refresh_interval" not in st.session_state:
+        st.session_state.refresh_interval = 30
+    if "system_status" not in st.session_state:
+        st.session_state.system_status = None
+    if "enhanced_features" not in st.session_state:
+        st.session_state.enhanced_features = {}
+    if "_stats" not in st.session_state:
+        st.session_state._stats = {}
+
+def setup_page_config():
+    """Setup page configuration"""
+    st.set_page_config(
+        page_title="TailorTalk Enhanced - AI Booking Assistant",
+        page_icon="🚀",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+def apply_custom_css():
+    """Apply enhanced custom CSS styles"""
+    # Streamlit drops elements a rerun does not emit, so the prebuilt block is re-sent each run
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
+
+def _request_health(api_url: str, http: requests.Session) -> Dict:
+    """Fetch the /health payload; uncached, so safe to call from worker threads"""
     try:
-        response = requests.get(f"{st.session_state.api_url}/health", timeout=10)
+        response = http.get(f"{api_url}/health", timeout=10)
         if response.status_code == 200:
-            return response.json()
+            return _json_loads(response.content)
         else:
             return {"status": "error", "message": f"HTTP {response.status_code}"}
-    except Exception as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         return {"status": "error", "message": str(e)}
 
-def get_availability(date_str: str, use_realtime: bool = True):
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_health(api_url: str, _http: requests.Session, _prefetched: Optional[Dict] = None) -> Dict:
+    """Fetch the /health payload, cached per API URL for a few seconds; _prefetched seeds a miss"""
+    return _prefetched if _prefetched is not None else _request_health(api_url, _http)
+
+def record_call(endpoint: str, started: float, cache_hit: bool = False):
+    """Add one call's latency, and whether the cache served it, to the endpoint's stats"""
+    stats = st.session_state._stats.setdefault(endpoint, {"n": 0, "hits": 0, "ms": 0.0})
+    stats["n"] += 1
+    stats["hits"] += cache_hit
+    stats["ms"] += (time.perf_counter() - started) * 1000
+
+def check_api_health(force: bool = False):
+    """Check API health and return detailed status"""
+    if force:
+        _fetch_health.clear()
+    started = time.perf_counter()
+    health_data = _fetch_health(st.session_state.api_url, st.session_state.http)
+    # st.cache_data does not report hits, so a near-instant return is taken as one
+    record_call("/health", started, (time.perf_counter() - started) * 1000 < CACHE_HIT_THRESHOLD_MS)
+    return health_data
+
+def _probe_endpoint(http: requests.Session, url: str, params: Optional[Dict] = None) -> bool:
+    """Return whether a GET to url answers 200"""
+    try:
+        return http.get(url, params=params, timeout=10).status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+def invalidate_availability_cache(date_str: Optional[str] = None):
+    """Drop cached availability for one date, or for every date if none is given"""
+    for key in list(_avail_cache):
+        if date_str is None or key[1] == date_str:
+            _avail_cache.pop(key, None)
+    
+    # Forgetting when the dates were refreshed makes them due on the next run
+    last_refresh = st.session_state.last_refresh_per_date
+    if date_str is None:
+        last_refresh.clear()
+    else:
+        last_refresh.pop(date_str, None)
+
+def track_availability(date_str: str, data: Dict):
+    """Show availability for a date in the panel, evicting the oldest dates past the cap"""
+    tracked = st.session_state.availability_data
+    tracked[date_str] = data
+    while len(tracked) > MAX_TRACKED_DATES:
+        forget_date(next(iter(tracked)))
+
+def forget_date(date_str: str):
+    """Stop tracking a date in the availability panel"""
+    st.session_state.availability_data.pop(date_str, None)
+    st.session_state.last_refresh_per_date.pop(date_str, None)
+
+def store_availability(date_str: str, use_realtime: bool, data: Dict):
+    """Record fresh availability in the TTL cache and session state"""
+    _avail_cache[(st.session_state.api_url, date_str, use_realtime)] = (time.monotonic(), data)
+    track_availability(date_str, data)
+    st.session_state.last_availability_check = datetime.now()
+    st.session_state.last_refresh_per_date[date_str] = time.monotonic()
+
+async def _fetch_availability_async(client: httpx.AsyncClient, api_url: str, date_str: str, use_realtime: bool):
+    """Fetch availability for one date without touching session state"""
+    endpoint = f"/realtime/availability/{date_str}" if use_realtime else f"/availability/{date_str}"
+    response = await client.get(f"{api_url}{endpoint}")
+    return _json_loads(response.content) if response.status_code == 200 else None
+
+async def _fetch_all_availability(api_url: str, dates: List[str], use_realtime: bool):
+    """Fetch availability for several dates concurrently over one client"""
+    async with httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_keepalive_connections=10)) as client:
+        return await asyncio.gather(
+            *(_fetch_availability_async(client, api_url, date_str, use_realtime) for date_str in dates),
+            return_exceptions=True
+        )
+
+def refresh_all_availability(dates: List[str], use_realtime: bool = True):
+    """Refetch availability for every date in one concurrent round"""
+    if not dates:
+        return
+    
+    started = time.perf_counter()
+    results = asyncio.run(_fetch_all_availability(st.session_state.api_url, dates, use_realtime))
+    record_call("/availability (batch)", started)
+    
+    # Session state is only written from the script thread, once all fetches are back
+    for date_str, result in zip(dates, results):
+        if isinstance(result, Exception):
+            st.error(f"Error fetching availability: {result}")
+        elif result is not None:
+            store_availability(date_str, use_realtime, result)
+
+def get_availability(date_str: str, use_realtime: bool = True, force: bool = False):
     """Get availability for a specific date with real-time option"""
+    # The most recently queried date is the one auto-refresh keeps freshest
+    st.session_state.selected_date = date_str
+    started = time.perf_counter()
+    cache_key = (st.session_state.api_url, date_str, use_realtime)
+    cached = _avail_cache.get(cache_key)
+    if not force and cached and time.monotonic() - cached[0] < AVAILABILITY_CACHE_TTL:
+        track_availability(date_str, cached[1])
+        record_call("/availability", started, cache_hit=True)
+        return cached[1]
+    
     try:
         endpoint = f"/realtime/availability/{date_str}" if use_realtime else f"/availability/{date_str}"
-        response = requests.get(f"{st.session_state.api_url}{endpoint}", timeout=10)
+        response = st.session_state.http.get(f"{st.session_state.api_url}{endpoint}", timeout=10)
         if response.status_code == 200:
-            data = response.json()
-            st.session_state.availability_data[date_str] = data
-            st.session_state.last_availability_check = datetime.now()
+            data = _json_loads(response.content)
+            store_availability(date_str, use_realtime, data)
             return data
         else:
             return None
-    except Exception as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         st.error(f"Error fetching availability: {e}")
         return None
+    finally:
+        record_call("/availability", started)
 
 def render_enhanced_sidebar():
     """Render the enhanced sidebar with real-time features"""
@@ -188,6 +477,13 @@ def render_enhanced_sidebar():
         
         # Auto-refresh toggle
         st.session_state.auto_refresh = st.checkbox("🔄 Auto-refresh availability", value=st.session_state.auto_refresh)
+        st.session_state.refresh_interval = st.number_input(
+            "⏱️ Refresh interval (seconds)",
+            min_value=10,
+            max_value=300,
+            value=st.session_state.refresh_interval,
+            step=5
+        )
         
         # Enhanced connection test
         if st.button("🔍 Test Enhanced Connection"):
@@ -210,21 +506,18 @@ def render_enhanced_sidebar():
                     
                     # Display agent type
                     config = health_data.get('config', {})
-                    agent_type = config.get('active_agent_type', 'unknown')
-                    if agent_type == 'enhanced':
-                        st.markdown('<span class="agent-badge agent-enhanced">🎯 Enhanced Agent</span>', unsafe_allow_html=True)
-                    elif agent_type == 'openai':
-                        st.markdown('<span class="agent-badge agent-openai">🤖 OpenAI Agent</span>', unsafe_allow_html=True)
-                    elif agent_type == 'fallback':
-                        st.markdown('<span class="agent-badge agent-fallback">🔄 Fallback Agent</span>', unsafe_allow_html=True)
+                    agent_badge = _AGENT_STATUS_BADGES.get(config.get('active_agent_type', 'unknown'))
+                    if agent_badge:
+                        st.markdown(agent_badge, unsafe_allow_html=True)
                     
                     # Component status
                     components = health_data.get('components', {})
                     with st.expander("🔧 Component Details"):
                         for component, status in components.items():
-                            if 'error' in status.lower():
+                            status_lower = status.lower()
+                            if 'error' in status_lower:
                                 st.markdown(f"❌ **{component}**: {status}")
-                            elif any(word in status.lower() for word in ['configured', 'connected', 'ready', 'available']):
+                            elif _OK_STATUS_RE.search(status_lower):
                                 st.markdown(f"✅ **{component}**: {status}")
                             else:
                                 st.markdown(f"⚠️ **{component}**: {status}")
@@ -241,14 +534,12 @@ def render_enhanced_sidebar():
         # Enhanced Quick Actions
         st.markdown("### 🚀 Enhanced Quick Actions")
         
-        TIMEZONE = pytz.timezone('Asia/Kolkata')
-        
         # Real-time availability checks
         col1, col2 = st.columns(2)
         
         with col1:
             if st.button("📅 Today", key="check_today", help="Check today's availability with real-time updates"):
-                today = datetime.now(TIMEZONE).strftime('%Y-%m-%d')
+                today = st.session_state._now_ist.strftime('%Y-%m-%d')
                 with st.spinner("🔄 Getting real-time availability..."):
                     data = get_availability(today, use_realtime=True)
                     if data:
@@ -259,7 +550,7 @@ def render_enhanced_sidebar():
         
         with col2:
             if st.button("📅 Tomorrow", key="check_tomorrow", help="Check tomorrow's availability"):
-                tomorrow = (datetime.now(TIMEZONE) + timedelta(days=1)).strftime('%Y-%m-%d')
+                tomorrow = (st.session_state._now_ist + timedelta(days=1)).strftime('%Y-%m-%d')
                 with st.spinner("🔄 Getting real-time availability..."):
                     data = get_availability(tomorrow, use_realtime=True)
                     if data:
@@ -270,7 +561,7 @@ def render_enhanced_sidebar():
         
         # Date picker for custom dates
         st.markdown("**📆 Custom Date:**")
-        selected_date = st.date_input("Select date", min_value=datetime.now().date())
+        selected_date = st.date_input("Select date", min_value=st.session_state._now_ist.date())
         if st.button("🔍 Check Selected Date", key="check_custom"):
             date_str = selected_date.strftime('%Y-%m-%d')
             with st.spinner("🔄 Getting availability..."):
@@ -287,9 +578,9 @@ def render_enhanced_sidebar():
         test_text = st.text_input("Test parsing:", placeholder="e.g., '5th July at 3:30pm'")
         if st.button("🔍 Parse", key="test_parse") and test_text:
             try:
-                response = requests.get(f"{api_url}/parse-datetime", params={"text": test_text}, timeout=10)
+                response = st.session_state.http.get(f"{api_url}/parse-datetime", params={"text": test_text}, timeout=10)
                 if response.status_code == 200:
-                    data = response.json()
+                    data = _json_loads(response.content)
                     st.success("✅ Parsing Result:")
                     st.json({
                         "Date": data.get('date'),
@@ -299,7 +590,7 @@ def render_enhanced_sidebar():
                     })
                 else:
                     st.error("❌ Parsing failed")
-            except Exception as e:
+            except (requests.exceptions.RequestException, ValueError, TypeError) as e:
                 st.error(f"❌ Error: {e}")
         
         st.markdown("---")
@@ -307,18 +598,38 @@ def render_enhanced_sidebar():
         # Enhanced Features Info
         st.markdown("### ✨ Enhanced Features")
         
-        features_info = [
-            ("🎯 Precise Date Parsing", "Handles '5th July', '4th August 3:30pm', etc."),
-            ("🔄 Real-time Updates", "Availability updates every 30 seconds"),
-            ("🤖 Smart Conversations", "Context-aware multi-turn dialogues"),
-            ("📅 Enhanced Calendar", "Advanced Google Calendar integration"),
-            ("⚡ Instant Booking", "Direct calendar event creation"),
-            ("🛡️ Error Recovery", "Robust error handling and fallbacks")
-        ]
-        
-        for title, description in features_info:
+        for title, description in _FEATURES_INFO:
             with st.expander(title):
                 st.markdown(description)
+        
+        # Per-endpoint call counts, cache hits and latency for this session
+        if st.session_state._stats:
+            with st.expander("🔎 Cache/latency stats"):
+                st.markdown("<br>".join(
+                    f"**{endpoint}**: {stats['n']} calls, {stats['hits']} cached, "
+                    f"{stats['ms'] / stats['n']:.1f} ms avg"
+                    for endpoint, stats in st.session_state._stats.items()
+                ), unsafe_allow_html=True)
+
+def format_slot_12h(slot: str) -> str:
+    """Format an HH:MM slot as a 12-hour time"""
+    return _SLOT_LABELS.get(slot, slot)
+
+@lru_cache(maxsize=256)
+def render_slot_html(slot: str) -> str:
+    """Build the availability grid cell for one HH:MM slot"""
+    return (
+        f'<div class="availability-slot slot-available">'
+        f'<span><strong>{slot}</strong></span><span>{format_slot_12h(slot)}</span></div>'
+    )
+
+@lru_cache(maxsize=64)
+def format_updated_time(last_updated: str) -> str:
+    """Format an ISO last_updated stamp as HH:MM:SS, falling back to the raw value"""
+    try:
+        return datetime.fromisoformat(last_updated.replace('Z', '+00:00')).strftime('%H:%M:%S')
+    except ValueError:
+        return last_updated
 
 def display_availability_sidebar(data: Dict):
     """Display availability data in sidebar"""
@@ -330,28 +641,78 @@ def display_availability_sidebar(data: Dict):
     last_updated = data.get('last_updated', '')
     realtime_enabled = data.get('realtime_enabled', False)
     
-    st.markdown(f"**📊 Available Slots: {total_slots}**")
+    # Collect every line and emit them as a single markdown element
+    lines = [f"**📊 Available Slots: {total_slots}**"]
     
     if realtime_enabled:
-        st.markdown('<span class="realtime-indicator"></span> Real-time enabled', unsafe_allow_html=True)
+        lines.append('<span class="realtime-indicator"></span> Real-time enabled')
     
     if slots:
-        for slot in slots[:6]:  # Show first 6 slots
-            time_obj = datetime.strptime(slot, '%H:%M').time()
-            formatted_time = time_obj.strftime('%I:%M %p')
-            st.markdown(f"🟢 {slot} ({formatted_time})")
+        lines.extend(f"🟢 {slot} ({format_slot_12h(slot)})" for slot in slots[:6])  # Show first 6 slots
         
         if len(slots) > 6:
-            st.markdown(f"... and {len(slots) - 6} more slots")
+            lines.append(f"... and {len(slots) - 6} more slots")
     else:
-        st.markdown("❌ No available slots")
+        lines.append("❌ No available slots")
     
     if last_updated:
-        try:
-            updated_time = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-            st.markdown(f"🕐 Updated: {updated_time.strftime('%H:%M:%S')}")
-        except:
-            st.markdown(f"🕐 Updated: {last_updated}")
+        lines.append(f"🕐 Updated: {format_updated_time(last_updated)}")
+    
+    st.markdown("<br>".join(lines), unsafe_allow_html=True)
+
+def render_message_html(message: Dict) -> str:
+    """Build the chat bubble HTML for a message"""
+    if message["role"] == "user":
+        return f"""
+                <div class="chat-message user-message">
+                    <div>👤</div>
+                    <div class="message-content">
+                        <strong>You:</strong><br>
+                        {message["content"]}
+                        <div style="font-size: 0.8em; opacity: 0.8; margin-top: 0.5rem;">
+                            {message.get('timestamp', '')}
+                        </div>
+                    </div>
+                </div>
+                """
+    elif message["role"] == "assistant":
+        agent_badge = _AGENT_BADGES.get(message.get('agent_type', 'unknown'), "")
+        return f"""
+                <div class="chat-message assistant-message">
+                    <div>🤖</div>
+                    <div class="message-content">
+                        <strong>TailorTalk Enhanced:</strong> {agent_badge}<br>
+                        {message["content"]}
+                        <div style="font-size: 0.8em; opacity: 0.8; margin-top: 0.5rem;">
+                            {message.get('timestamp', '')}
+                        </div>
+                    </div>
+                </div>
+                """
+    else:  # system messages
+        return f"""
+                <div class="chat-message system-message">
+                    <div>🔧</div>
+                    <div class="message-content">
+                        <strong>System:</strong><br>
+                        {message["content"]}
+                    </div>
+                </div>
+                """
+
+def get_message_html(message: Dict) -> str:
+    """Get a message's cached HTML, rendering it on first use"""
+    html = message.get("_html")
+    if html is None:
+        html = message["_html"] = render_message_html(message)
+    return html
+
+def append_message(message: Dict):
+    """Append a chat message with its HTML prerendered"""
+    message["_html"] = render_message_html(message)
+    st.session_state.messages.append(message)
+    if len(st.session_state.messages) > MAX_STORED_MESSAGES:
+        del st.session_state.messages[:-MAX_STORED_MESSAGES]
 
 def render_enhanced_chat_interface():
     """Render the enhanced main chat interface"""
@@ -379,8 +740,7 @@ def render_enhanced_chat_interface():
     st.markdown("### 💬 Chat with TailorTalk Enhanced")
     
     # Display current time with timezone
-    TIMEZONE = pytz.timezone('Asia/Kolkata')
-    current_time = datetime.now(TIMEZONE).strftime('%I:%M %p IST on %A, %B %d, %Y')
+    current_time = st.session_state._now_ist.strftime('%I:%M %p IST on %A, %B %d, %Y')
     st.info(f"🕐 Current time: {current_time}")
     
     # Auto-refresh indicator
@@ -390,52 +750,16 @@ def render_enhanced_chat_interface():
     # Display enhanced chat messages
     chat_container = st.container()
     with chat_container:
-        for i, message in enumerate(st.session_state.messages):
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <div>👤</div>
-                    <div class="message-content">
-                        <strong>You:</strong><br>
-                        {message["content"]}
-                        <div style="font-size: 0.8em; opacity: 0.8; margin-top: 0.5rem;">
-                            {message.get('timestamp', '')}
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            elif message["role"] == "assistant":
-                agent_type = message.get('agent_type', 'unknown')
-                agent_badge = ""
-                if agent_type == 'enhanced':
-                    agent_badge = '<span class="agent-badge agent-enhanced">Enhanced</span>'
-                elif agent_type == 'openai':
-                    agent_badge = '<span class="agent-badge agent-openai">OpenAI</span>'
-                elif agent_type == 'fallback':
-                    agent_badge = '<span class="agent-badge agent-fallback">Fallback</span>'
-                
-                st.markdown(f"""
-                <div class="chat-message assistant-message">
-                    <div>🤖</div>
-                    <div class="message-content">
-                        <strong>TailorTalk Enhanced:</strong> {agent_badge}<br>
-                        {message["content"]}
-                        <div style="font-size: 0.8em; opacity: 0.8; margin-top: 0.5rem;">
-                            {message.get('timestamp', '')}
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:  # system messages
-                st.markdown(f"""
-                <div class="chat-message system-message">
-                    <div>🔧</div>
-                    <div class="message-content">
-                        <strong>System:</strong><br>
-                        {message["content"]}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        messages = st.session_state.messages
+        older, recent = messages[:-MAX_RENDERED_MESSAGES], messages[-MAX_RENDERED_MESSAGES:]
+        
+        # Older history collapses into one pre-joined markdown element
+        if older:
+            with st.expander(f"Show {len(older)} earlier messages"):
+                st.markdown("".join(get_message_html(message) for message in older), unsafe_allow_html=True)
+        
+        for message in recent:
+            st.markdown(get_message_html(message), unsafe_allow_html=True)
 
 def handle_enhanced_chat_input():
     """Handle enhanced chat input with better error handling and features"""
@@ -444,70 +768,70 @@ def handle_enhanced_chat_input():
     
     if user_input:
         # Add timestamp to user message
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        st.session_state.messages.append({
+        timestamp = st.session_state._ts
+        append_message({
             "role": "user", 
             "content": user_input,
             "timestamp": timestamp
         })
         
         # Send to enhanced API
+        started = time.perf_counter()
         try:
             with st.spinner("🤖 TailorTalk Enhanced is processing..."):
-                response = requests.post(
+                # Release the pooled connection as soon as the body has been read
+                with st.session_state.http.post(
                     f"{st.session_state.api_url}/chat",
-                    json={
+                    data=_json_dumps({
                         "message": user_input,
-                        "user_id": f"streamlit_user_{int(time.time())}"
-                    },
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    assistant_response = data["response"]
-                    agent_type = data.get("agent_type", "unknown")
+                        "user_id": st.session_state.user_id
+                    }),
+                    headers={"Content-Type": "application/json"},
+                    timeout=30,
+                    stream=True
+                ) as response:
+                    if response.status_code == 200:
+                        data = _json_loads(response.content)
+                        assistant_response = data["response"]
+                        agent_type = data.get("agent_type", "unknown")
+                        
+                        # Add assistant message with metadata
+                        append_message({
+                            "role": "assistant", 
+                            "content": assistant_response,
+                            "agent_type": agent_type,
+                            "timestamp": timestamp
+                        })
+                        
+                        # Show success with agent type
+                        if agent_type == 'enhanced':
+                            st.success("✅ Response from Enhanced Agent!")
+                        elif agent_type == 'openai':
+                            st.success("✅ Response from OpenAI Agent!")
+                        else:
+                            st.success("✅ Response received!")
+                        
+                        # A booking-related reply may have changed any date, so drop cached availability
+                        if _BOOKING_RE.search(assistant_response):
+                            invalidate_availability_cache()
                     
-                    # Add assistant message with metadata
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": assistant_response,
-                        "agent_type": agent_type,
-                        "timestamp": timestamp
-                    })
-                    
-                    # Show success with agent type
-                    if agent_type == 'enhanced':
-                        st.success("✅ Response from Enhanced Agent!")
-                    elif agent_type == 'openai':
-                        st.success("✅ Response from OpenAI Agent!")
                     else:
-                        st.success("✅ Response received!")
-                    
-                    # Auto-refresh availability if booking-related
-                    if any(word in assistant_response.lower() for word in ['book', 'schedule', 'available', 'appointment']):
-                        if st.session_state.auto_refresh:
-                            # Trigger availability refresh
-                            today = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d')
-                            get_availability(today, use_realtime=True)
-                
-                else:
-                    st.error(f"❌ Enhanced API Error: {response.status_code}")
-                    try:
-                        error_data = response.json()
-                        error_message = error_data.get('detail', f'HTTP {response.status_code}')
-                    except:
-                        error_message = f"HTTP {response.status_code}"
-                    
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": f"I apologize, but I encountered an error: {error_message}. Please try again.",
-                        "timestamp": timestamp
-                    })
+                        st.error(f"❌ Enhanced API Error: {response.status_code}")
+                        try:
+                            error_data = _json_loads(response.content)
+                            error_message = error_data.get('detail', f'HTTP {response.status_code}')
+                        except (ValueError, AttributeError):
+                            error_message = f"HTTP {response.status_code}"
+                        
+                        append_message({
+                            "role": "assistant", 
+                            "content": f"I apologize, but I encountered an error: {error_message}. Please try again.",
+                            "timestamp": timestamp
+                        })
                     
         except requests.exceptions.Timeout:
             st.error("⏰ Request timed out. The enhanced AI might be processing a complex request.")
-            st.session_state.messages.append({
+            append_message({
                 "role": "assistant", 
                 "content": "I'm taking longer than usual to process your request. Please try again.",
                 "timestamp": timestamp
@@ -515,159 +839,104 @@ def handle_enhanced_chat_input():
         except requests.exceptions.ConnectionError:
             st.error("🔌 Connection error. Make sure your Enhanced FastAPI server is running.")
             st.info("💡 Start the server with: `python main_with_ai.py`")
-            st.session_state.messages.append({
+            append_message({
                 "role": "assistant", 
                 "content": "I'm having trouble connecting to my enhanced backend services. Please make sure the API server is running.",
                 "timestamp": timestamp
             })
-        except Exception as e:
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
             st.error(f"❌ Unexpected error: {str(e)}")
-            st.session_state.messages.append({
+            append_message({
                 "role": "assistant", 
                 "content": f"I encountered an unexpected error: {str(e)}. Please try again.",
                 "timestamp": timestamp
             })
+        finally:
+            record_call("/chat", started)
         
         # Rerun to update the chat display
         st.rerun()
 
 def send_message_to_api(message: str):
     """Helper function to send message to API and handle response"""
+    started = time.perf_counter()
     try:
-        timestamp = datetime.now().strftime('%H:%M:%S')
+        timestamp = st.session_state._ts
         
         with st.spinner("🤖 TailorTalk Enhanced is thinking..."):
-            response = requests.post(
+            # Release the pooled connection as soon as the body has been read
+            with st.session_state.http.post(
                 f"{st.session_state.api_url}/chat",
-                json={
+                data=_json_dumps({
                     "message": message,
-                    "user_id": f"streamlit_user_{int(time.time())}"
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                assistant_response = data["response"]
-                agent_type = data.get("agent_type", "unknown")
-                
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": assistant_response,
-                    "agent_type": agent_type,
-                    "timestamp": timestamp
-                })
-                
-                # Show success notification
-                if agent_type == 'enhanced':
-                    st.success("✅ Enhanced Agent Response!")
+                    "user_id": st.session_state.user_id
+                }),
+                headers={"Content-Type": "application/json"},
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code == 200:
+                    data = _json_loads(response.content)
+                    assistant_response = data["response"]
+                    agent_type = data.get("agent_type", "unknown")
+                    
+                    append_message({
+                        "role": "assistant", 
+                        "content": assistant_response,
+                        "agent_type": agent_type,
+                        "timestamp": timestamp
+                    })
+                    
+                    # Show success notification
+                    if agent_type == 'enhanced':
+                        st.success("✅ Enhanced Agent Response!")
+                    else:
+                        st.success("✅ Response received!")
+                    
+                    # Example prompts are mostly bookings; drop cached slots as the chat input does
+                    if _BOOKING_RE.search(assistant_response):
+                        invalidate_availability_cache()
+                    
+                    return True
                 else:
-                    st.success("✅ Response received!")
-                
-                return True
-            else:
-                st.error(f"❌ API Error: {response.status_code}")
-                return False
+                    st.error(f"❌ API Error: {response.status_code}")
+                    return False
                 
-    except Exception as e:
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
         st.error(f"❌ Error: {str(e)}")
         return False
+    finally:
+        record_call("/chat", started)
+
+def queue_chat_action(message: str):
+    """Queue a chat message to be sent at the start of the next run"""
+    # A newer action replaces one that has not been dispatched yet
+    st.session_state.pending = {"action": "chat", "message": message}
+
+def process_pending_action():
+    """Dispatch the queued user action exactly once"""
+    pending = st.session_state.pop("pending", None)
+    if pending and pending["action"] == "chat":
+        timestamp = st.session_state._ts
+        append_message({"role": "user", "content": pending["message"], "timestamp": timestamp})
+        send_message_to_api(pending["message"])
 
 def render_enhanced_example_prompts():
     """Render enhanced example prompt buttons with working functionality"""
     st.markdown("---")
     st.markdown("### 💡 Try these enhanced examples:")
     
-    # Row 1: Booking examples
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("📅 Book tomorrow afternoon", key="example1", help="Book appointment for tomorrow afternoon"):
-            message = "Book appointment on tomorrow afternoon"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    with col2:
-        if st.button("🕐 Check Friday availability", key="example2", help="Check what's available this Friday"):
-            message = "Check Friday availability"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    with col3:
-        if st.button("📞 Book next week", key="example3", help="Schedule something for next week"):
-            message = "Book a meeting for next week"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    # Row 2: More specific examples
-    col4, col5, col6 = st.columns(3)
-    
-    with col4:
-        if st.button("🌅 Morning meeting", key="example4", help="Schedule a morning meeting"):
-            message = "Schedule a meeting for tomorrow morning at 10 AM"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    with col5:
-        if st.button("📋 Check today's schedule", key="example5", help="See today's availability"):
-            message = "What's my availability for today?"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    with col6:
-        if st.button("👋 Say hello", key="example6", help="Greet TailorTalk"):
-            message = "Hello! How can you help me with scheduling?"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    # Row 3: Enhanced examples
-    st.markdown("**🎯 Enhanced Parsing Examples:**")
-    col7, col8, col9 = st.columns(3)
-    
-    with col7:
-        if st.button("📅 5th July 3:30pm", key="example7", help="Test precise date/time parsing"):
-            message = "Book appointment on 5th July at 3:30pm"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    with col8:
-        if st.button("📅 4th August 15:00", key="example8", help="Test 24-hour format"):
-            message = "Schedule meeting for 4th August at 15:00"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
-    
-    with col9:
-        if st.button("📅 Next Monday morning", key="example9", help="Test relative date parsing"):
-            message = "Book appointment for next Monday morning"
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({"role": "user", "content": message, "timestamp": timestamp})
-            
-            if send_message_to_api(message):
-                st.rerun()
+    # Three rows of three: booking, specific and enhanced parsing examples
+    for row_start in range(0, len(_EXAMPLES), 3):
+        if row_start == 6:
+            st.markdown("**🎯 Enhanced Parsing Examples:**")
+        
+        for index, col in enumerate(st.columns(3), start=row_start):
+            label, message, help_text = _EXAMPLES[index]
+            with col:
+                if st.button(label, key=f"example{index + 1}", help=help_text):
+                    queue_chat_action(message)
+                    st.rerun()
 
 def render_enhanced_controls():
     """Render enhanced controls with real-time features"""
@@ -685,51 +954,21 @@ def render_enhanced_controls():
     with col2:
         if st.button("🔄 Refresh All", key="refresh_all"):
             # Refresh system status
-            st.session_state.system_status = check_api_health()
+            st.session_state.system_status = check_api_health(force=True)
             
             # Refresh current availability
             if st.session_state.availability_data:
-                for date_str in st.session_state.availability_data.keys():
-                    get_availability(date_str, use_realtime=True)
+                refresh_all_availability(list(st.session_state.availability_data.keys()))
             
             st.success("✅ All data refreshed!")
             st.rerun()
     
     with col3:
         if st.button("📖 Enhanced Help", key="enhanced_help"):
-            help_message = """
-            **🚀 TailorTalk Enhanced Help:**
-            
-            **Enhanced Features:**
-            • **Precise Parsing**: "5th July at 3:30pm", "4th August 15:00"
-            • **Real-time Updates**: Availability refreshes automatically
-            • **Smart Conversations**: Context-aware responses
-            • **Multiple Agents**: Enhanced, OpenAI, and Fallback modes
-            
-            **Booking Examples:**
-            • "Book appointment on 5th July at 3:30pm"
-            • "Schedule meeting for August 4th at 15:00"
-            • "Book for tomorrow at 2 PM"
-            • "Show me availability for next Monday"
+            help_message = _HELP_MESSAGE
             
-            **Date Formats Supported:**
-            • Specific: "5th July", "August 4th", "July 5th"
-            • Relative: "tomorrow", "next Monday", "next week"
-            • Numeric: "2025-07-05", "5/7/2025"
-            
-            **Time Formats Supported:**
-            • 12-hour: "3:30pm", "11:45am"
-            • 24-hour: "15:00", "09:30"
-            • Relative: "morning", "afternoon", "evening"
-            
-            **Real-time Features:**
-            • Auto-refresh availability every 30 seconds
-            • Live status indicators
-            • Instant booking confirmations
-            """
-            
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            st.session_state.messages.append({
+            timestamp = st.session_state._ts
+            append_message({
                 "role": "system", 
                 "content": help_message,
                 "timestamp": timestamp
@@ -737,32 +976,29 @@ def render_enhanced_controls():
             st.rerun()
     
     with col4:
-        if st.button("🧪 Test Enhanced API", key="test_enhanced"):
+        # The probe runs only on the rerun triggered by the form submit
+        with st.form("test_enhanced_form", clear_on_submit=False):
+            submitted = st.form_submit_button("🧪 Test Enhanced API")
+        
+        if submitted:
             with st.spinner("Testing enhanced API endpoints..."):
-                # Test health endpoint
-                health_data = check_api_health()
-                
-                # Test parsing endpoint
-                try:
-                    parse_response = requests.get(
-                        f"{st.session_state.api_url}/parse-datetime",
-                        params={"text": "5th July at 3:30pm"},
-                        timeout=10
-                    )
-                    parse_success = parse_response.status_code == 200
-                except:
-                    parse_success = False
-                
-                # Test availability endpoint
-                try:
-                    today = datetime.now().strftime('%Y-%m-%d')
-                    avail_response = requests.get(
-                        f"{st.session_state.api_url}/availability/{today}",
-                        timeout=10
-                    )
-                    avail_success = avail_response.status_code == 200
-                except:
-                    avail_success = False
+                # Health, parsing and availability probes run concurrently; only
+                # plain values cross into the worker threads, not session state
+                api_url = st.session_state.api_url
+                http = st.session_state.http
+                today = st.session_state._now_ist.strftime('%Y-%m-%d')
+                executor = get_executor()
+                # Workers have no script context, so they call the uncached helper
+                health_future = executor.submit(_request_health, api_url, http)
+                parse_future = executor.submit(
+                    _probe_endpoint, http, f"{api_url}/parse-datetime", {"text": "5th July at 3:30pm"}
+                )
+                avail_future = executor.submit(_probe_endpoint, http, f"{api_url}/availability/{today}")
+                # Back on the script thread, the fresh payload warms the health cache
+                health_data = health_future.result()
+                _fetch_health(api_url, http, _prefetched=health_data)
+                parse_success = parse_future.result()
+                avail_success = avail_future.result()
                 
                 # Display results
                 results = f"""
@@ -783,8 +1019,8 @@ def render_enhanced_controls():
                     feature_name = feature.replace('_', ' ').title()
                     results += f"\n• **{feature_name}**: {status}"
                 
-                timestamp = datetime.now().strftime('%H:%M:%S')
-                st.session_state.messages.append({
+                timestamp = st.session_state._ts
+                append_message({
                     "role": "system", 
                     "content": results,
                     "timestamp": timestamp
@@ -793,12 +1029,28 @@ def render_enhanced_controls():
 
 def render_real_time_availability():
     """Render real-time availability display"""
+    # With fragments, the panel polls on its own timer instead of on every script rerun
+    if _fragment is not None and st.session_state.auto_refresh:
+        _fragment(run_every=st.session_state.refresh_interval)(_auto_refreshing_availability_panel)()
+    else:
+        render_availability_panel()
+
+def _auto_refreshing_availability_panel():
+    """Refresh tracked dates when the interval has elapsed, then render them"""
+    auto_refresh_availability()
+    render_availability_panel()
+
+def render_availability_panel():
+    """Render the tracked availability dates"""
     if st.session_state.availability_data:
         st.markdown("---")
         st.markdown("### 📊 Real-time Availability")
         
         for date_str, data in st.session_state.availability_data.items():
-            with st.expander(f"📅 {data.get('formatted_date', date_str)} ({data.get('total_slots', 0)} slots)"):
+            with st.expander(
+                f"📅 {data.get('formatted_date', date_str)} ({data.get('total_slots', 0)} slots)",
+                expanded=date_str == st.session_state.selected_date
+            ):
                 slots = data.get('available_slots', [])
                 realtime_enabled = data.get('realtime_enabled', False)
                 last_updated = data.get('last_updated', '')
@@ -807,50 +1059,42 @@ def render_real_time_availability():
                     st.markdown('<span class="realtime-indicator"></span> Real-time updates enabled', unsafe_allow_html=True)
                 
                 if slots:
-                    # Create a grid of available slots
-                    cols = st.columns(3)
-                    for i, slot in enumerate(slots):
-                        with cols[i % 3]:
-                            time_obj = datetime.strptime(slot, '%H:%M').time()
-                            formatted_time = time_obj.strftime('%I:%M %p')
-                            st.markdown(f"""
-                            <div class="availability-slot slot-available">
-                                <span><strong>{slot}</strong></span>
-                                <span>{formatted_time}</span>
-                            </div>
-                            """, unsafe_allow_html=True)
+                    # One CSS grid element per date instead of one markdown element per slot
+                    grid_html = "".join(render_slot_html(slot) for slot in slots)
+                    st.markdown(f'<div class="availability-grid">{grid_html}</div>', unsafe_allow_html=True)
                 else:
                     st.markdown('<div class="availability-slot slot-booked">No available slots</div>', unsafe_allow_html=True)
                 
                 if last_updated:
-                    try:
-                        updated_time = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                        st.caption(f"🕐 Last updated: {updated_time.strftime('%H:%M:%S')}")
-                    except:
-                        st.caption(f"🕐 Last updated: {last_updated}")
+                    st.caption(f"🕐 Last updated: {format_updated_time(last_updated)}")
 
 def render_enhanced_footer():
     """Render the enhanced footer"""
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; color: #666; font-size: 0.9em;">
-        <p>🚀 <strong>TailorTalk Enhanced AI Booking Assistant</strong></p>
-        <p>Powered by Enhanced AI Agents, Precise Date/Time Parsing, Real-time Calendar Integration</p>
-        <p>Built with FastAPI, Streamlit, Google Calendar API, and ❤️</p>
-        <p>✨ Features: Real-time Updates • Enhanced Parsing • Smart Conversations • Multiple AI Agents</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 def auto_refresh_availability():
     """Auto-refresh availability data if enabled"""
+    # Dates before today (IST) have nothing left to book
+    today = st.session_state._now_ist.strftime('%Y-%m-%d')
+    for date_str in [d for d in st.session_state.availability_data if d < today]:
+        forget_date(date_str)
+    
     if st.session_state.auto_refresh and st.session_state.availability_data:
-        current_time = time.time()
-        if (st.session_state.last_availability_check is None or 
-            current_time - st.session_state.last_availability_check.timestamp() > 30):
-            
-            # Refresh availability for all tracked dates
-            for date_str in list(st.session_state.availability_data.keys()):
-                get_availability(date_str, use_realtime=True)
+        now = time.monotonic()
+        # A second of slack keeps a refresh from slipping a whole tick behind the timer
+        interval = st.session_state.refresh_interval - 1
+        last_refresh = st.session_state.last_refresh_per_date
+        
+        # The selected date refreshes every interval, the rest on a slower tier
+        due_dates = [
+            date_str for date_str in st.session_state.availability_data
+            if date_str not in last_refresh or now - last_refresh[date_str] >= (
+                interval if date_str == st.session_state.selected_date
+                else interval * UNSELECTED_REFRESH_MULTIPLIER
+            )
+        ]
+        refresh_all_availability(due_dates)
 
 def main():
     """Enhanced main application function"""
@@ -863,8 +1107,14 @@ def main():
     # Apply enhanced custom CSS
     apply_custom_css()
     
-    # Auto-refresh availability if enabled
-    auto_refresh_availability()
+    # Send any example prompt queued by the previous run
+    process_pending_action()
+    
+    # Without fragment support, a browser timer triggers the reruns that poll availability
+    if _fragment is None:
+        if st_autorefresh is not None and st.session_state.auto_refresh:
+            st_autorefresh(interval=st.session_state.refresh_interval * 1000, key="avail_tick")
+        auto_refresh_availability()
     
     # Render enhanced sidebar
     render_enhanced_sidebar()
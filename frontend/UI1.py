@@ -4,13 +4,17 @@ Provides a user-friendly interface for AI-powered calendar booking
 """
 import streamlit as st
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
-import pytz
-from urllib.parse import parse_qs, urlparse
+from typing import Dict, Any, Final, Optional, List
+from zoneinfo import ZoneInfo
 import time
+import asyncio
+import re
+import calendar
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,7 +22,55 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 API_BASE_URL = "http://localhost:8001"
-TIMEZONE = pytz.timezone('Asia/Kolkata')
+TIMEZONE = ZoneInfo('Asia/Kolkata')
+
+# Only the newest chat turns are drawn directly; older ones sit behind an expander
+MAX_RENDERED_MESSAGES = 50
+
+# Chat turns kept per session; the oldest are dropped first
+MAX_STORED_MESSAGES = 200
+
+# Static header and footer markup
+_HEADER_HTML: Final = """
+    <div class="main-header">
+        <h1>🤖 TailorTalk Enhanced</h1>
+        <p>AI-Powered Google Calendar Booking Assistant</p>
+    </div>
+    """
+
+_FOOTER_HTML: Final = """
+    <div style="text-align: center; color: #666; padding: 1rem;">
+        🤖 <strong>TailorTalk Enhanced</strong> - AI-Powered Calendar Assistant<br>
+        Built with FastAPI, LangGraph, and Google Calendar API
+    </div>
+    """
+
+# Leading "YYYY-MM-DDTHH:MM" of an event start; the wall-clock digits are shown as-is
+_ISO_START_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2})')
+
+# Agent replies that confirm a new booking, single ("Booked Successfully") or batched ("Booked 2 of 3")
+_BOOKED_RE = re.compile(r'successfully booked|booked successfully|booked \d+ of', re.IGNORECASE)
+
+def _minify_css(css: str) -> str:
+    """Collapse a <style> block's whitespace; Streamlit re-sends it on every rerun"""
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};])\s*', r'\1', css).strip()
+
+@st.cache_resource(show_spinner=False)
+def get_session() -> requests.Session:
+    """Create the keep-alive API session shared across sessions and reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Streamlit re-executes this module on every rerun; the cached resource keeps one pool
+_SESSION = get_session()
 
 # Page configuration
 st.set_page_config(
@@ -29,7 +81,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+st.markdown(_minify_css("""
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -82,13 +134,16 @@ st.markdown("""
         margin: 0.5rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""), unsafe_allow_html=True)
 
 def initialize_session_state():
     """Initialize Streamlit session state variables"""
     if 'user_id' not in st.session_state:
         st.session_state.user_id = f"user_{int(time.time())}"
     
+    # One clock reading shared by every call site in this script run
+    st.session_state._now = datetime.now(TIMEZONE)
+    
     if 'authenticated' not in st.session_state:
         st.session_state.authenticated = False
     
@@ -105,61 +160,89 @@ def check_url_params():
     """Check URL parameters for authentication results"""
     try:
         # Get query parameters from URL
-        query_params = st.experimental_get_query_params()
+        query_params = st.query_params
         
-        if 'auth_success' in query_params and query_params['auth_success'][0] == 'true':
+        if query_params.get('auth_success') == 'true':
+            _auth_status_cached.clear()
             st.session_state.authenticated = True
-            st.session_state.user_id = query_params.get('user_id', [st.session_state.user_id])[0]
+            st.session_state.user_id = query_params.get('user_id', st.session_state.user_id)
             
             # Store user info
             st.session_state.user_info = {
-                'name': query_params.get('user_name', [''])[0],
-                'email': query_params.get('user_email', [''])[0]
+                'name': query_params.get('user_name', ''),
+                'email': query_params.get('user_email', '')
             }
             
             st.success("🎉 Authentication successful! You can now book appointments.")
             
             # Clear URL parameters
-            st.experimental_set_query_params()
+            st.query_params.clear()
         
         elif 'error' in query_params:
-            error_msg = query_params['error'][0]
+            error_msg = query_params['error']
             st.error(f"❌ Authentication failed: {error_msg}")
             
             # Clear URL parameters
-            st.experimental_set_query_params()
+            st.query_params.clear()
             
     except Exception as e:
         logger.error(f"Error checking URL parameters: {e}")
 
+def _request_auth_status(user_id: str) -> Dict[str, Any]:
+    """Fetch auth status for a user, uncached; failures raise"""
+    response = _SESSION.get(f"{API_BASE_URL}/auth/status/{user_id}", timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _auth_status_cached(user_id: str, _prefetched: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fetch auth status for a user; failures raise so they are never cached"""
+    return _prefetched if _prefetched is not None else _request_auth_status(user_id)
+
 def check_authentication_status():
     """Check current authentication status with the API"""
     try:
-        response = requests.get(f"{API_BASE_URL}/auth/status/{st.session_state.user_id}")
+        auth_data = _auth_status_cached(st.session_state.user_id)
+        st.session_state.authenticated = auth_data['authenticated']
         
-        if response.status_code == 200:
-            auth_data = response.json()
-            st.session_state.authenticated = auth_data['authenticated']
-            
-            if auth_data['authenticated'] and auth_data['user_info']:
-                st.session_state.user_info = auth_data['user_info']
-            
-            st.session_state.auth_checked = True
-            return auth_data
-        else:
-            st.session_state.authenticated = False
-            return None
+        if auth_data['authenticated'] and auth_data['user_info']:
+            st.session_state.user_info = auth_data['user_info']
+        
+        st.session_state.auth_checked = True
+        return auth_data
             
     except Exception as e:
         logger.error(f"Authentication status check failed: {e}")
         st.session_state.authenticated = False
         return None
 
+def prefetch_sidebar_data():
+    """Warm the auth-status and health caches concurrently on a session's first run"""
+    if st.session_state.auth_checked:
+        return
+    
+    user_id = st.session_state.user_id
+    
+    # Worker threads have no script context, so they call the uncached helpers
+    async def _warm():
+        return await asyncio.gather(
+            asyncio.to_thread(_request_auth_status, user_id),
+            asyncio.to_thread(_request_health, API_BASE_URL),
+            return_exceptions=True
+        )
+    
+    auth_data, health_data = asyncio.run(_warm())
+    
+    # Seed the caches from the script thread; a failed auth lookup is left to retry
+    if not isinstance(auth_data, Exception):
+        _auth_status_cached(user_id, _prefetched=auth_data)
+    _fetch_health(API_BASE_URL, _prefetched=health_data)
+
 def initiate_google_auth():
     """Initiate Google authentication flow"""
     try:
         with st.spinner("Initiating Google authentication..."):
-            response = requests.post(
+            response = _SESSION.post(
                 f"{API_BASE_URL}/auth/initiate",
                 json={"redirect_uri": f"{API_BASE_URL}/auth/callback"}
             )
@@ -195,12 +278,13 @@ def revoke_access():
     """Revoke user access"""
     try:
         with st.spinner("Revoking access..."):
-            response = requests.delete(f"{API_BASE_URL}/auth/revoke/{st.session_state.user_id}")
+            response = _SESSION.delete(f"{API_BASE_URL}/auth/revoke/{st.session_state.user_id}")
             
             if response.status_code == 200:
                 result = response.json()
                 
                 if result['success']:
+                    _auth_status_cached.clear()
                     st.session_state.authenticated = False
                     st.session_state.user_info = {}
                     st.session_state.chat_history = []
@@ -218,7 +302,7 @@ def send_chat_message(message: str) -> Optional[str]:
     """Send chat message to the API"""
     try:
         with st.spinner("AI is thinking..."):
-            response = requests.post(
+            response = _SESSION.post(
                 f"{API_BASE_URL}/chat",
                 json={
                     "message": message,
@@ -237,21 +321,26 @@ def send_chat_message(message: str) -> Optional[str]:
         logger.error(f"Chat message failed: {e}")
         return f"❌ Connection error: {str(e)}"
 
-def get_availability(date_str: str) -> Optional[Dict[str, Any]]:
+@st.cache_data(ttl=30, show_spinner=False)
+def _get_availability_cached(user_id: str, date_str: str) -> Dict[str, Any]:
+    """Fetch availability for a user and date; failures raise so they are never cached"""
+    response = _SESSION.post(
+        f"{API_BASE_URL}/availability",
+        json={
+            "user_id": user_id,
+            "date": date_str
+        }
+    )
+    response.raise_for_status()
+    return response.json()
+
+def get_availability(date_str: str, force: bool = False) -> Optional[Dict[str, Any]]:
     """Get availability for a specific date"""
+    if force:
+        _get_availability_cached.clear()
+    
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/availability",
-            json={
-                "user_id": st.session_state.user_id,
-                "date": date_str
-            }
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
+        return _get_availability_cached(st.session_state.user_id, date_str)
             
     except Exception as e:
         logger.error(f"Availability check failed: {e}")
@@ -260,7 +349,7 @@ def get_availability(date_str: str) -> Optional[Dict[str, Any]]:
 def get_upcoming_events() -> Optional[List[Dict[str, Any]]]:
     """Get upcoming events"""
     try:
-        response = requests.get(f"{API_BASE_URL}/users/{st.session_state.user_id}/upcoming-events")
+        response = _SESSION.get(f"{API_BASE_URL}/users/{st.session_state.user_id}/upcoming-events")
         
         if response.status_code == 200:
             result = response.json()
@@ -272,14 +361,27 @@ def get_upcoming_events() -> Optional[List[Dict[str, Any]]]:
         logger.error(f"Upcoming events fetch failed: {e}")
         return None
 
+@lru_cache(maxsize=64)
+def _day_label(year: int, month: int, day: int) -> str:
+    """Format a date as 'Weekday, Month DD'"""
+    return f"{calendar.day_name[calendar.weekday(year, month, day)]}, {calendar.month_name[month]} {day:02d}"
+
+def format_event_start(start_time: str) -> str:
+    """Format an event start as 'Weekday, Month DD at hh:mm AM', or return it unchanged"""
+    match = _ISO_START_RE.match(start_time)
+    if not match:
+        return start_time
+    
+    year, month, day, hour, minute = map(int, match.groups())
+    try:
+        day_label = _day_label(year, month, day)
+    except (ValueError, IndexError):
+        return start_time
+    return f"{day_label} at {(hour - 1) % 12 + 1:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
 def render_header():
     """Render the main header"""
-    st.markdown("""
-    <div class="main-header">
-        <h1>🤖 TailorTalk Enhanced</h1>
-        <p>AI-Powered Google Calendar Booking Assistant</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
 
 def render_authentication_section():
     """Render authentication section"""
@@ -302,7 +404,7 @@ def render_authentication_section():
         
         if st.sidebar.button("🚪 Sign Out", type="secondary"):
             revoke_access()
-            st.experimental_rerun()
+            st.rerun()
     else:
         st.sidebar.markdown("""
         <div class="auth-status auth-pending">
@@ -323,7 +425,7 @@ def render_quick_actions():
         
         with col1:
             if st.button("📅 Check Today", use_container_width=True):
-                today = datetime.now(TIMEZONE).strftime('%Y-%m-%d')
+                today = st.session_state._now.strftime('%Y-%m-%d')
                 availability = get_availability(today)
                 
                 if availability:
@@ -344,15 +446,29 @@ def render_quick_actions():
                 else:
                     st.info("📋 No upcoming events")
 
+def _request_health(api_url: str) -> Dict[str, Any]:
+    """Fetch the /health payload, uncached; empty on failure"""
+    try:
+        response = _SESSION.get(f"{api_url}/health", timeout=5)
+        if response.status_code == 200:
+            return response.json()
+    except Exception as e:
+        logger.error(f"Health check failed: {e}")
+    return {}
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_health(api_url: str, _prefetched: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fetch the /health payload, cached briefly so reruns skip the round-trip"""
+    return _prefetched if _prefetched is not None else _request_health(api_url)
+
 def render_system_stats():
     """Render system statistics"""
     st.sidebar.header("📊 System Stats")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
+        health_data = _fetch_health(API_BASE_URL)
         
-        if response.status_code == 200:
-            health_data = response.json()
+        if health_data:
             stats = health_data.get('statistics', {})
             
             st.sidebar.markdown(f"""
@@ -370,33 +486,41 @@ def render_system_stats():
     except Exception as e:
         st.sidebar.error(f"❌ Stats error: {str(e)}")
 
+@lru_cache(maxsize=256)
+def render_chat_message_html(role: str, message: str, timestamp: str) -> str:
+    """Build the chat bubble HTML for one history entry"""
+    if role == "user":
+        return (
+            f'<div class="chat-message user-message">'
+            f'<strong>👤 You</strong> <small>({timestamp})</small><br>{message}</div>'
+        )
+    return (
+        f'<div class="chat-message assistant-message">'
+        f'<strong>🤖 TailorTalk</strong> <small>({timestamp})</small><br>{message}</div>'
+    )
+
 def render_chat_interface():
     """Render the main chat interface"""
     st.header("💬 Chat with AI Assistant")
     
-    # Display chat history
-    for i, (role, message, timestamp) in enumerate(st.session_state.chat_history):
-        if role == "user":
-            st.markdown(f"""
-            <div class="chat-message user-message">
-                <strong>👤 You</strong> <small>({timestamp})</small><br>
-                {message}
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="chat-message assistant-message">
-                <strong>🤖 TailorTalk</strong> <small>({timestamp})</small><br>
-                {message}
-            </div>
-            """, unsafe_allow_html=True)
+    # Display chat history: older turns collapse behind an expander and each
+    # part is emitted as one pre-joined markdown element
+    history = st.session_state.chat_history
+    older, recent = history[:-MAX_RENDERED_MESSAGES], history[-MAX_RENDERED_MESSAGES:]
+    
+    if older:
+        with st.expander(f"Show {len(older)} earlier messages"):
+            st.markdown("".join(render_chat_message_html(*entry) for entry in older), unsafe_allow_html=True)
+    
+    if recent:
+        st.markdown("".join(render_chat_message_html(*entry) for entry in recent), unsafe_allow_html=True)
     
     # Chat input
     user_input = st.chat_input("Type your message here...")
     
     if user_input:
         # Add user message to history
-        timestamp = datetime.now(TIMEZONE).strftime('%H:%M')
+        timestamp = st.session_state._now.strftime('%H:%M')
         st.session_state.chat_history.append(("user", user_input, timestamp))
         
         # Get AI response
@@ -405,9 +529,15 @@ def render_chat_interface():
         if ai_response:
             # Add AI response to history
             st.session_state.chat_history.append(("assistant", ai_response, timestamp))
+            
+            # A new booking makes cached availability stale
+            if _BOOKED_RE.search(ai_response):
+                _get_availability_cached.clear()
+        
+        del st.session_state.chat_history[:-MAX_STORED_MESSAGES]
         
         # Rerun to update the display
-        st.experimental_rerun()
+        st.rerun()
 
 def render_calendar_tools():
     """Render calendar management tools"""
@@ -421,13 +551,21 @@ def render_calendar_tools():
             
             selected_date = st.date_input(
                 "Select Date",
-                value=datetime.now(TIMEZONE).date(),
-                min_value=datetime.now(TIMEZONE).date()
+                value=st.session_state._now.date(),
+                min_value=st.session_state._now.date()
             )
             
-            if st.button("Check Availability", type="primary"):
+            col_check, col_refresh = st.columns(2)
+            
+            with col_check:
+                check_clicked = st.button("Check Availability", type="primary")
+            
+            with col_refresh:
+                refresh_clicked = st.button("🔄 Refresh", type="secondary")
+            
+            if check_clicked or refresh_clicked:
                 date_str = selected_date.strftime('%Y-%m-%d')
-                availability = get_availability(date_str)
+                availability = get_availability(date_str, force=refresh_clicked)
                 
                 if availability:
                     slots = availability['available_slots']
@@ -454,17 +592,7 @@ def render_calendar_tools():
                     st.success(f"📋 Found {len(events)} upcoming events:")
                     
                     for event in events[:10]:  # Show first 10 events
-                        start_time = event['start']
-                        
-                        # Parse and format the datetime
-                        try:
-                            if 'T' in start_time:
-                                dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                                formatted_time = dt.strftime('%A, %B %d at %I:%M %p')
-                            else:
-                                formatted_time = start_time
-                        except:
-                            formatted_time = start_time
+                        formatted_time = format_event_start(event['start'])
                         
                         st.markdown(f"""
                         **{event['summary']}**  
@@ -481,11 +609,11 @@ def render_calendar_tools():
             with st.form("quick_book_form"):
                 book_date = st.date_input(
                     "Date",
-                    value=datetime.now(TIMEZONE).date() + timedelta(days=1),
-                    min_value=datetime.now(TIMEZONE).date()
+                    value=st.session_state._now.date() + timedelta(days=1),
+                    min_value=st.session_state._now.date()
                 )
                 
-                book_time = st.time_input("Time", value=datetime.now(TIMEZONE).time())
+                book_time = st.time_input("Time", value=st.session_state._now.time())
                 
                 book_title = st.text_input("Title", value="TailorTalk Appointment")
                 
@@ -503,7 +631,9 @@ def render_calendar_tools():
                     # Send to AI assistant
                     ai_response = send_chat_message(booking_message)
                     
-                    if "successfully booked" in ai_response.lower():
+                    if _BOOKED_RE.search(ai_response):
+                        # A new booking makes cached availability stale
+                        _get_availability_cached.clear()
                         st.success("✅ " + ai_response)
                     else:
                         st.error("❌ " + ai_response)
@@ -516,6 +646,9 @@ def main():
     # Check URL parameters for auth results
     check_url_params()
     
+    # Overlap the sidebar's two lookups so first paint waits for the slower one
+    prefetch_sidebar_data()
+    
     # Render header
     render_header()
     
@@ -535,12 +668,7 @@ def main():
     
     # Footer
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; color: #666; padding: 1rem;">
-        🤖 <strong>TailorTalk Enhanced</strong> - AI-Powered Calendar Assistant<br>
-        Built with FastAPI, LangGraph, and Google Calendar API
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
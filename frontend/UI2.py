@@ -1,26 +1,108 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import re
 from datetime import datetime, timedelta
 import time
-import pytz
+import uuid
+from zoneinfo import ZoneInfo
 import asyncio
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 import os
 
-# Configure Streamlit page
-def setup_page_config():
-    st.set_page_config(
-        page_title="TailorTalk Enhanced - AI Booking Assistant",
-        page_icon="🚀",
-        layout="wide",
-        initial_sidebar_state="expanded"
+TIMEZONE = ZoneInfo('Asia/Kolkata')
+
+# The deployment's own backend; only this URL gets a background poller
+DEFAULT_API_URL = os.getenv("API_URL", "https://tailortalk-enhanced-1.onrender.com")
+
+@st.cache_resource(show_spinner=False)
+def get_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.2)
     )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-# Custom CSS for better styling
-def apply_custom_css():
-    st.markdown("""
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4)
+
+# Streamlit re-executes this module on every rerun; the cached resource keeps one pool
+_SESSION = get_session()
+
+@st.cache_resource(show_spinner=False)
+def _etag_store() -> Dict[str, tuple]:
+    return {}
+
+# URL -> (ETag, body) of the last full response, shared with worker and poller threads
+_ETAGS = _etag_store()
+
+def _get_json_revalidated(session: requests.Session, url: str, timeout: int = 10):
+    # An unchanged resource comes back as a bodiless 304 and the stored body is reused
+    stored = _ETAGS.get(url)
+    headers = {"If-None-Match": stored[0]} if stored else None
+    response = session.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and stored:
+        return stored[1]
+    response.raise_for_status()
+    data = response.json()
+    if response.headers.get("ETag"):
+        _ETAGS[url] = (response.headers["ETag"], data)
+    return data
+
+# "HH:MM" -> "hh:mm AM/PM" for every minute of the day, built once at import
+_SLOT_FMT = {
+    f"{h:02d}:{m:02d}": datetime(2000, 1, 1, h, m).strftime('%I:%M %p')
+    for h in range(24) for m in range(60)
+}
+
+# st.fragment graduated from st.experimental_fragment; older Streamlit has neither
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+# Only the newest messages render in the main flow; older ones sit behind an expander
+VISIBLE_MESSAGES = 20
+
+# Minimum age of availability data before a booking reply triggers an immediate refetch
+AVAILABILITY_DEBOUNCE_SECONDS = 30
+
+# Chat avatars by message role, and display names for the agent that answered
+_AVATARS = {"user": "👤", "assistant": "🤖", "system": "🔧"}
+_AGENT_LABELS = {"enhanced": "Enhanced", "openai": "OpenAI", "demo": "Demo", "fallback": "Fallback"}
+
+# Sidebar badge HTML for the backend's active agent; unknown types show no badge
+_AGENT_BADGE = {
+    "enhanced": '<span class="agent-badge agent-enhanced">🎯 Enhanced Agent</span>',
+    "openai": '<span class="agent-badge agent-openai">🤖 OpenAI Agent</span>',
+    "fallback": '<span class="agent-badge agent-fallback">🔄 Fallback Agent</span>',
+    "demo": '<span class="agent-badge demo-badge">🎭 Demo Agent</span>'
+}
+
+# Demo-mode intents in priority order; substring matches, as with the old keyword lists
+_DEMO_INTENTS = (
+    (re.compile(r'book|schedule|appointment', re.IGNORECASE),
+     "I'd be happy to help you book an appointment! In the full version, I would check your calendar availability and create the booking. For this demo, I can show you that I understand booking requests like 'Book appointment on 5th July at 3:30pm' or 'Schedule a meeting for tomorrow afternoon'."),
+    (re.compile(r'availability|available|free', re.IGNORECASE),
+     "I can check availability for you! In the full version, I would connect to your Google Calendar and show real-time availability. You can test the availability checker in the sidebar by clicking 'Today' or 'Tomorrow'."),
+    (re.compile(r'hello|hi|hey', re.IGNORECASE),
+     "Hello! Welcome to TailorTalk Enhanced! I'm your AI booking assistant. I can help you with scheduling appointments, checking availability, and managing your calendar. This is currently running in demo mode - the full version would connect to your Google Calendar for real-time booking."),
+    (re.compile(r'help|what|how', re.IGNORECASE),
+     "I'm TailorTalk Enhanced, an AI-powered booking assistant! I can help you with:\n\n• Booking appointments with natural language\n• Checking calendar availability\n• Scheduling meetings\n• Managing your calendar\n\nTry asking me to 'Book an appointment tomorrow at 2pm' or 'Check my availability for Friday'!")
+)
+
+def _minify_css(css: str) -> str:
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};])\s*', r'\1', css).strip()
+
+# Static stylesheet, minified once at import time
+_CUSTOM_CSS = _minify_css("""
     <style>
         .chat-message {
             padding: 1rem;
@@ -150,39 +232,78 @@ def apply_custom_css():
             font-weight: bold;
         }
     </style>
-    """, unsafe_allow_html=True)
+    """)
+
+# Configure Streamlit page
+def setup_page_config():
+    st.set_page_config(
+        page_title="TailorTalk Enhanced - AI Booking Assistant",
+        page_icon="🚀",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+# Custom CSS for better styling
+def apply_custom_css():
+    # Streamlit drops elements a rerun does not emit, so the prebuilt block is re-sent each run
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 def initialize_session_state():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "api_url" not in st.session_state:
-        st.session_state.api_url = os.getenv("API_URL", "https://tailortalk-enhanced-1.onrender.com")
+        st.session_state.api_url = DEFAULT_API_URL
     if "availability_data" not in st.session_state:
         st.session_state.availability_data = {}
     if "last_availability_check" not in st.session_state:
         st.session_state.last_availability_check = None
+    if "availability_stale" not in st.session_state:
+        st.session_state.availability_stale = False
     if "auto_refresh" not in st.session_state:
         st.session_state.auto_refresh = True
+    if "poll_interval" not in st.session_state:
+        st.session_state.poll_interval = DEFAULT_POLL_INTERVAL
     if "system_status" not in st.session_state:
         st.session_state.system_status = None
     if "enhanced_features" not in st.session_state:
         st.session_state.enhanced_features = {}
     if "demo_mode" not in st.session_state:
         st.session_state.demo_mode = False
+    if "user_id" not in st.session_state:
+        # One id for the whole browser session so the backend can keep conversation state
+        st.session_state.user_id = f"streamlit_user_{uuid.uuid4().hex[:12]}"
 
-def check_api_health():
+# Cached fetches take plain arguments and never touch session state; the
+# wrappers below apply their side effects on every call, hit or miss
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_health(api_url: str):
+    # Returns (health payload, whether the API was unreachable)
     try:
-        response = requests.get(f"{st.session_state.api_url}/health", timeout=5)
+        response = _SESSION.get(f"{api_url}/health", timeout=5)
         if response.status_code == 200:
-            return response.json()
+            return response.json(), False
         else:
-            return {"status": "error", "message": f"HTTP {response.status_code}"}
+            return {"status": "error", "message": f"HTTP {response.status_code}"}, False
     except requests.exceptions.ConnectionError:
-        st.session_state.demo_mode = True
-        return {"status": "demo", "message": "API not available - Demo mode enabled"}
+        return {"status": "demo", "message": "API not available - Demo mode enabled"}, True
     except Exception as e:
+        return {"status": "error", "message": str(e)}, True
+
+def _request_availability(api_url: str, date_str: str, use_realtime: bool):
+    # Uncached, so worker threads without a script context can call it; failures raise
+    endpoint = f"/realtime/availability/{date_str}" if use_realtime else f"/availability/{date_str}"
+    return _get_json_revalidated(_SESSION, f"{api_url}{endpoint}")
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_availability(api_url: str, date_str: str, use_realtime: bool, _prefetched: Optional[Dict] = None):
+    # Failures raise so they are not cached; _prefetched seeds a miss with a worker's result
+    return _prefetched if _prefetched is not None else _request_availability(api_url, date_str, use_realtime)
+
+def check_api_health():
+    health_data, unreachable = _fetch_health(st.session_state.api_url)
+    if unreachable:
         st.session_state.demo_mode = True
-        return {"status": "error", "message": str(e)}
+    return health_data
 
 def get_availability(date_str: str, use_realtime: bool = True):
     if st.session_state.demo_mode:
@@ -195,19 +316,108 @@ def get_availability(date_str: str, use_realtime: bool = True):
         }
     
     try:
-        endpoint = f"/realtime/availability/{date_str}" if use_realtime else f"/availability/{date_str}"
-        response = requests.get(f"{st.session_state.api_url}{endpoint}", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            st.session_state.availability_data[date_str] = data
-            st.session_state.last_availability_check = datetime.now()
-            return data
-        else:
-            return None
+        data = _fetch_availability(st.session_state.api_url, date_str, use_realtime)
+        st.session_state.availability_data[date_str] = data
+        st.session_state.last_availability_check = datetime.now()
+        return data
+    except requests.exceptions.HTTPError:
+        return None
     except Exception as e:
         st.error(f"Error fetching availability: {e}")
         return None
 
+def get_availability_many(dates: List[str], use_realtime: bool = True) -> Dict[str, Dict]:
+    if st.session_state.demo_mode:
+        return {date_str: get_availability(date_str, use_realtime) for date_str in dates}
+    
+    # Workers run the uncached fetch; the cache and session state are written back on this thread
+    api_url = st.session_state.api_url
+    futures = [get_executor().submit(_request_availability, api_url, date_str, use_realtime) for date_str in dates]
+    results = {}
+    for date_str, future in zip(dates, futures):
+        try:
+            results[date_str] = future.result()
+        except Exception:
+            continue
+        _fetch_availability(api_url, date_str, use_realtime, _prefetched=results[date_str])
+    
+    st.session_state.availability_data.update(results)
+    if results:
+        st.session_state.last_availability_check = datetime.now()
+    return results
+
+def get_availability_batch(dates: List[str]) -> Dict[str, Dict]:
+    if st.session_state.demo_mode:
+        return {date_str: get_availability(date_str) for date_str in dates}
+    
+    # One round-trip for every date; dates the API rejects are simply absent
+    try:
+        response = _SESSION.post(
+            f"{st.session_state.api_url}/realtime/availability/batch",
+            json={"dates": dates},
+            timeout=10
+        )
+        if response.status_code != 200:
+            # Older backends lack the batch route; fetch the dates side by side instead
+            return get_availability_many(dates)
+        results = response.json()
+    except Exception:
+        return get_availability_many(dates)
+    
+    st.session_state.availability_data.update(results)
+    if results:
+        st.session_state.last_availability_check = datetime.now()
+    return results
+
+# Background polling runs on one daemon thread per server process, never on the rerun
+# path. Sessions lease the dates they track and the interval they want; leases not
+# renewed by a rerun within POLL_LEASE_SECONDS lapse, so closed sessions stop costing
+DEFAULT_POLL_INTERVAL = 30
+POLL_LEASE_SECONDS = 300
+
+def _poll_loop(state: Dict, session: requests.Session):
+    while True:
+        with state["lock"]:
+            now = time.monotonic()
+            today = datetime.now(TIMEZONE).strftime('%Y-%m-%d')
+            # Past dates never change again; stop polling them along with lapsed leases
+            state["dates"] = {d: t for d, t in state["dates"].items() if d >= today and now - t < POLL_LEASE_SECONDS}
+            state["intervals"] = {k: v for k, v in state["intervals"].items() if now - v[1] < POLL_LEASE_SECONDS}
+            state["results"] = {d: r for d, r in state["results"].items() if d in state["dates"]}
+            # The most eager live session sets the pace
+            state["interval"] = min((i for i, _ in state["intervals"].values()), default=DEFAULT_POLL_INTERVAL)
+            interval = state["interval"]
+            dates = sorted(state["dates"])
+        
+        for date_str in dates:
+            try:
+                data = _get_json_revalidated(session, f"{DEFAULT_API_URL}/realtime/availability/{date_str}")
+            except Exception:
+                continue
+            with state["lock"]:
+                state["results"][date_str] = data
+                state["updated_at"] = datetime.now()
+        
+        # A newly leased date or a shorter interval wakes the loop early
+        state["wake"].wait(timeout=interval)
+        state["wake"].clear()
+
+@st.cache_resource(show_spinner=False)
+def start_poller() -> Dict:
+    state = {
+        "lock": threading.Lock(),
+        "wake": threading.Event(),
+        "interval": DEFAULT_POLL_INTERVAL,
+        "intervals": {},
+        "dates": {},
+        "results": {},
+        "updated_at": None
+    }
+    # The cached session is fetched here on the script thread; the poller thread has no script context
+    session = get_session()
+    threading.Thread(target=_poll_loop, args=(state, session), daemon=True).start()
+    return state
+
 def render_demo_banner():
     if st.session_state.demo_mode:
         st.markdown("""
@@ -228,8 +438,16 @@ def render_enhanced_sidebar():
         st.session_state.api_url = api_url
         
         st.session_state.auto_refresh = st.checkbox("🔄 Auto-refresh availability", value=st.session_state.auto_refresh)
+        if st.session_state.auto_refresh:
+            st.session_state.poll_interval = st.slider(
+                "Refresh interval (seconds)", min_value=15, max_value=300,
+                value=st.session_state.poll_interval, step=15
+            )
         
         if st.button("🔍 Test Enhanced Connection"):
+            # An explicit connection test always goes to the network
+            _fetch_health.clear()
+            _fetch_availability.clear()
             with st.spinner("Testing enhanced connection..."):
                 health_data = check_api_health()
                 st.session_state.system_status = health_data
@@ -248,13 +466,9 @@ def render_enhanced_sidebar():
                         st.markdown(f"{icon} {feature_name}")
                     
                     config = health_data.get('config', {})
-                    agent_type = config.get('active_agent_type', 'unknown')
-                    if agent_type == 'enhanced':
-                        st.markdown('<span class="agent-badge agent-enhanced">🎯 Enhanced Agent</span>', unsafe_allow_html=True)
-                    elif agent_type == 'openai':
-                        st.markdown('<span class="agent-badge agent-openai">🤖 OpenAI Agent</span>', unsafe_allow_html=True)
-                    elif agent_type == 'fallback':
-                        st.markdown('<span class="agent-badge agent-fallback">🔄 Fallback Agent</span>', unsafe_allow_html=True)
+                    badge = _AGENT_BADGE.get(config.get('active_agent_type', 'unknown'))
+                    if badge:
+                        st.markdown(badge, unsafe_allow_html=True)
                     
                     components = health_data.get('components', {})
                     with st.expander("🔧 Component Details"):
@@ -285,13 +499,21 @@ def render_enhanced_sidebar():
         
         st.markdown("### 🚀 Enhanced Quick Actions")
         
-        TIMEZONE = pytz.timezone('Asia/Kolkata')
+        today = datetime.now(TIMEZONE).strftime('%Y-%m-%d')
+        tomorrow = (datetime.now(TIMEZONE) + timedelta(days=1)).strftime('%Y-%m-%d')
+        
+        # Prefetch both quick-action dates in one request, once per session per day, so the
+        # availability panel has them on first paint; the buttons below still fetch (30s cache)
+        if st.session_state.get("prefetched_for") != today and not st.session_state.demo_mode:
+            st.session_state.prefetched_for = today
+            missing = [d for d in (today, tomorrow) if d not in st.session_state.availability_data]
+            if missing:
+                get_availability_batch(missing)
         
         col1, col2 = st.columns(2)
         
         with col1:
             if st.button("📅 Today", key="check_today", help="Check today's availability with real-time updates"):
-                today = datetime.now(TIMEZONE).strftime('%Y-%m-%d')
                 with st.spinner("🔄 Getting real-time availability..."):
                     data = get_availability(today, use_realtime=True)
                     if data:
@@ -302,7 +524,6 @@ def render_enhanced_sidebar():
         
         with col2:
             if st.button("📅 Tomorrow", key="check_tomorrow", help="Check tomorrow's availability"):
-                tomorrow = (datetime.now(TIMEZONE) + timedelta(days=1)).strftime('%Y-%m-%d')
                 with st.spinner("🔄 Getting real-time availability..."):
                     data = get_availability(tomorrow, use_realtime=True)
                     if data:
@@ -329,7 +550,7 @@ def render_enhanced_sidebar():
             test_text = st.text_input("Test parsing:", placeholder="e.g., '5th July at 3:30pm'")
             if st.button("🔍 Parse", key="test_parse") and test_text:
                 try:
-                    response = requests.get(f"{st.session_state.api_url}/parse-datetime", params={"text": test_text}, timeout=10)
+                    response = _SESSION.get(f"{st.session_state.api_url}/parse-datetime", params={"text": test_text}, timeout=10)
                     if response.status_code == 200:
                         data = response.json()
                         st.success("✅ Parsing Result:")
@@ -377,11 +598,10 @@ def display_availability_sidebar(data: Dict):
     
     if slots:
         for slot in slots[:6]:
-            try:
-                time_obj = datetime.strptime(slot, '%H:%M').time()
-                formatted_time = time_obj.strftime('%I:%M %p')
+            formatted_time = _SLOT_FMT.get(slot)
+            if formatted_time:
                 st.markdown(f"🟢 {slot} ({formatted_time})")
-            except:
+            else:
                 st.markdown(f"🟢 {slot}")
         
         if len(slots) > 6:
@@ -420,83 +640,60 @@ def render_enhanced_chat_interface():
     
     st.markdown("### 💬 Chat with TailorTalk Enhanced")
     
-    TIMEZONE = pytz.timezone('Asia/Kolkata')
     current_time = datetime.now(TIMEZONE).strftime('%I:%M %p IST on %A, %B %d, %Y')
     st.info(f"🕐 Current time: {current_time}")
     
     if st.session_state.auto_refresh:
         st.markdown('<span class="realtime-indicator"></span> Auto-refresh enabled', unsafe_allow_html=True)
     
-    chat_container = st.container()
+    # Filled after the input is handled, so a new turn shows without another rerun
+    return st.container()
+
+def render_chat_history(chat_container):
     with chat_container:
-        for i, message in enumerate(st.session_state.messages):
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <div>👤</div>
-                    <div class="message-content">
-                        <strong>You:</strong><br>
-                        {message["content"]}
-                        <div style="font-size: 0.8em; opacity: 0.8; margin-top: 0.5rem;">
-                            {message.get('timestamp', '')}
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            elif message["role"] == "assistant":
-                agent_type = message.get('agent_type', 'demo' if st.session_state.demo_mode else 'unknown')
-                agent_badge = ""
-                if agent_type == 'enhanced':
-                    agent_badge = '<span class="agent-badge agent-enhanced">Enhanced</span>'
-                elif agent_type == 'openai':
-                    agent_badge = '<span class="agent-badge agent-openai">OpenAI</span>'
-                elif agent_type == 'demo':
-                    agent_badge = '<span class="agent-badge demo-badge">Demo</span>'
-                elif agent_type == 'fallback':
-                    agent_badge = '<span class="agent-badge agent-fallback">Fallback</span>'
-                
-                message_class = "demo-message" if st.session_state.demo_mode else "assistant-message"
-                
-                st.markdown(f"""
-                <div class="chat-message {message_class}">
-                    <div>🤖</div>
-                    <div class="message-content">
-                        <strong>TailorTalk Enhanced:</strong> {agent_badge}<br>
-                        {message["content"]}
-                        <div style="font-size: 0.8em; opacity: 0.8; margin-top: 0.5rem;">
-                            {message.get('timestamp', '')}
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="chat-message system-message">
-                    <div>🔧</div>
-                    <div class="message-content">
-                        <strong>System:</strong><br>
-                        {message["content"]}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        messages = st.session_state.messages
+        older, recent = messages[:-VISIBLE_MESSAGES], messages[-VISIBLE_MESSAGES:]
+        
+        if older:
+            with st.expander(f"Earlier ({len(older)} messages)"):
+                for message in older:
+                    render_chat_message(message)
+        
+        for message in recent:
+            render_chat_message(message)
+
+def render_chat_panel():
+    # Runs as a fragment where available: a chat turn reruns only this region
+    chat_container = render_enhanced_chat_interface()
+    handle_enhanced_chat_input()
+    render_chat_history(chat_container)
+
+def render_chat_message(message: Dict):
+    role = message["role"]
+    with st.chat_message(role, avatar=_AVATARS.get(role, "🔧")):
+        if role == "system":
+            # System notes are indented template strings; flatten them so
+            # markdown does not read the indentation as a code block
+            st.markdown("\n".join(line.strip() for line in message["content"].splitlines()))
+        else:
+            st.markdown(message["content"])
+        
+        details = []
+        if role == "assistant":
+            agent_type = message.get('agent_type', 'demo' if st.session_state.demo_mode else 'unknown')
+            if agent_type in _AGENT_LABELS:
+                details.append(_AGENT_LABELS[agent_type])
+        if message.get('timestamp'):
+            details.append(message['timestamp'])
+        if details:
+            st.caption(" · ".join(details))
 
 def generate_demo_response(user_input: str) -> str:
-    user_input_lower = user_input.lower()
+    for pattern, response in _DEMO_INTENTS:
+        if pattern.search(user_input):
+            return response
     
-    if any(word in user_input_lower for word in ['book', 'schedule', 'appointment']):
-        return "I'd be happy to help you book an appointment! In the full version, I would check your calendar availability and create the booking. For this demo, I can show you that I understand booking requests like 'Book appointment on 5th July at 3:30pm' or 'Schedule a meeting for tomorrow afternoon'."
-    
-    elif any(word in user_input_lower for word in ['availability', 'available', 'free']):
-        return "I can check availability for you! In the full version, I would connect to your Google Calendar and show real-time availability. You can test the availability checker in the sidebar by clicking 'Today' or 'Tomorrow'."
-    
-    elif any(word in user_input_lower for word in ['hello', 'hi', 'hey']):
-        return "Hello! Welcome to TailorTalk Enhanced! I'm your AI booking assistant. I can help you with scheduling appointments, checking availability, and managing your calendar. This is currently running in demo mode - the full version would connect to your Google Calendar for real-time booking."
-    
-    elif any(word in user_input_lower for word in ['help', 'what', 'how']):
-        return "I'm TailorTalk Enhanced, an AI-powered booking assistant! I can help you with:\n\n• Booking appointments with natural language\n• Checking calendar availability\n• Scheduling meetings\n• Managing your calendar\n\nTry asking me to 'Book an appointment tomorrow at 2pm' or 'Check my availability for Friday'!"
-    
-    else:
-        return f"I understand you said: '{user_input}'. In the full version, I would process this with advanced AI and provide intelligent responses. This demo shows the interface - the real system includes Google Calendar integration, precise date/time parsing, and smart conversation handling!"
+    return f"I understand you said: '{user_input}'. In the full version, I would process this with advanced AI and provide intelligent responses. This demo shows the interface - the real system includes Google Calendar integration, precise date/time parsing, and smart conversation handling!"
 
 def handle_enhanced_chat_input():
     user_input = st.chat_input("Type your message here... (e.g., 'Book appointment on 5th July at 3:30pm')")
@@ -517,56 +714,60 @@ def handle_enhanced_chat_input():
                 "agent_type": "demo",
                 "timestamp": timestamp
             })
-            st.rerun()
         else:
+            # Set when the turn changes state rendered outside the chat panel
+            page_changed = False
             try:
                 with st.spinner("🤖 TailorTalk Enhanced is processing..."):
-                    response = requests.post(
+                    with _SESSION.post(
                         f"{st.session_state.api_url}/chat",
                         json={
                             "message": user_input,
-                            "user_id": f"streamlit_user_{int(time.time())}"
+                            "user_id": st.session_state.user_id
                         },
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        assistant_response = data["response"]
-                        agent_type = data.get("agent_type", "unknown")
-                        
-                        st.session_state.messages.append({
-                            "role": "assistant", 
-                            "content": assistant_response,
-                            "agent_type": agent_type,
-                            "timestamp": timestamp
-                        })
+                        timeout=30,
+                        stream=True
+                    ) as response:
+                        if response.status_code == 200:
+                            data = response.json()
+                            assistant_response = data["response"]
+                            agent_type = data.get("agent_type", "unknown")
+                            
+                            st.session_state.messages.append({
+                                "role": "assistant", 
+                                "content": assistant_response,
+                                "agent_type": agent_type,
+                                "timestamp": timestamp
+                            })
+                            
+                            if agent_type == 'enhanced':
+                                st.success("✅ Response from Enhanced Agent!")
+                            elif agent_type == 'openai':
+                                st.success("✅ Response from OpenAI Agent!")
+                            else:
+                                st.success("✅ Response received!")
+                            
+                            # A booking-related reply is the one signal that the calendar changed:
+                            # invalidate instead of refetching inline, so tracked dates reload on
+                            # the full rerun below and nothing is fetched for chats that change nothing
+                            if any(word in assistant_response.lower() for word in ['book', 'schedule', 'available', 'appointment']):
+                                _fetch_availability.clear()
+                                st.session_state.availability_stale = True
+                                page_changed = True
                         
-                        if agent_type == 'enhanced':
-                            st.success("✅ Response from Enhanced Agent!")
-                        elif agent_type == 'openai':
-                            st.success("✅ Response from OpenAI Agent!")
                         else:
-                            st.success("✅ Response received!")
-                        
-                        if any(word in assistant_response.lower() for word in ['book', 'schedule', 'available', 'appointment']):
-                            if st.session_state.auto_refresh:
-                                today = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d')
-                                get_availability(today, use_realtime=True)
-                    
-                    else:
-                        st.error(f"❌ Enhanced API Error: {response.status_code}")
-                        try:
-                            error_data = response.json()
-                            error_message = error_data.get('detail', f'HTTP {response.status_code}')
-                        except:
-                            error_message = f"HTTP {response.status_code}"
-                        
-                        st.session_state.messages.append({
-                            "role": "assistant", 
-                            "content": f"I apologize, but I encountered an error: {error_message}. Please try again.",
-                            "timestamp": timestamp
-                        })
+                            st.error(f"❌ Enhanced API Error: {response.status_code}")
+                            try:
+                                error_data = response.json()
+                                error_message = error_data.get('detail', f'HTTP {response.status_code}')
+                            except:
+                                error_message = f"HTTP {response.status_code}"
+                            
+                            st.session_state.messages.append({
+                                "role": "assistant", 
+                                "content": f"I apologize, but I encountered an error: {error_message}. Please try again.",
+                                "timestamp": timestamp
+                            })
                         
             except requests.exceptions.Timeout:
                 st.error("⏰ Request timed out. The enhanced AI might be processing a complex request.")
@@ -578,6 +779,7 @@ def handle_enhanced_chat_input():
             except requests.exceptions.ConnectionError:
                 st.error("🔌 Connection error. Switching to demo mode.")
                 st.session_state.demo_mode = True
+                page_changed = True
                 demo_response = generate_demo_response(user_input)
                 st.session_state.messages.append({
                     "role": "assistant", 
@@ -593,7 +795,8 @@ def handle_enhanced_chat_input():
                     "timestamp": timestamp
                 })
             
-            st.rerun()
+            if page_changed:
+                st.rerun()
 
 def send_message_to_api(message: str):
     if st.session_state.demo_mode:
@@ -612,36 +815,36 @@ def send_message_to_api(message: str):
         timestamp = datetime.now().strftime('%H:%M:%S')
         
         with st.spinner("🤖 TailorTalk Enhanced is thinking..."):
-            response = requests.post(
+            with _SESSION.post(
                 f"{st.session_state.api_url}/chat",
                 json={
                     "message": message,
-                    "user_id": f"streamlit_user_{int(time.time())}"
+                    "user_id": st.session_state.user_id
                 },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                assistant_response = data["response"]
-                agent_type = data.get("agent_type", "unknown")
-                
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": assistant_response,
-                    "agent_type": agent_type,
-                    "timestamp": timestamp
-                })
-                
-                if agent_type == 'enhanced':
-                    st.success("✅ Enhanced Agent Response!")
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code == 200:
+                    data = response.json()
+                    assistant_response = data["response"]
+                    agent_type = data.get("agent_type", "unknown")
+                    
+                    st.session_state.messages.append({
+                        "role": "assistant", 
+                        "content": assistant_response,
+                        "agent_type": agent_type,
+                        "timestamp": timestamp
+                    })
+                    
+                    if agent_type == 'enhanced':
+                        st.success("✅ Enhanced Agent Response!")
+                    else:
+                        st.success("✅ Response received!")
+                    
+                    return True
                 else:
-                    st.success("✅ Response received!")
-                
-                return True
-            else:
-                st.error(f"❌ API Error: {response.status_code}")
-                return False
+                    st.error(f"❌ API Error: {response.status_code}")
+                    return False
                 
     except Exception as e:
         st.error(f"❌ Error: {str(e)}")
@@ -764,8 +967,7 @@ def render_enhanced_controls():
             st.session_state.system_status = check_api_health()
             
             if st.session_state.availability_data:
-                for date_str in st.session_state.availability_data.keys():
-                    get_availability(date_str, use_realtime=True)
+                get_availability_many(list(st.session_state.availability_data))
             
             st.success("✅ All data refreshed!")
             st.rerun()
@@ -818,7 +1020,7 @@ def render_enhanced_controls():
                 
                 if not st.session_state.demo_mode:
                     try:
-                        parse_response = requests.get(
+                        parse_response = _SESSION.get(
                             f"{st.session_state.api_url}/parse-datetime",
                             params={"text": "5th July at 3:30pm"},
                             timeout=10
@@ -829,7 +1031,7 @@ def render_enhanced_controls():
                     
                     try:
                         today = datetime.now().strftime('%Y-%m-%d')
-                        avail_response = requests.get(
+                        avail_response = _SESSION.get(
                             f"{st.session_state.api_url}/availability/{today}",
                             timeout=10
                         )
@@ -885,16 +1087,15 @@ def render_real_time_availability():
                     cols = st.columns(3)
                     for i, slot in enumerate(slots):
                         with cols[i % 3]:
-                            try:
-                                time_obj = datetime.strptime(slot, '%H:%M').time()
-                                formatted_time = time_obj.strftime('%I:%M %p')
+                            formatted_time = _SLOT_FMT.get(slot)
+                            if formatted_time:
                                 st.markdown(f"""
                                 <div class="availability-slot slot-available">
                                     <span><strong>{slot}</strong></span>
                                     <span>{formatted_time}</span>
                                 </div>
                                 """, unsafe_allow_html=True)
-                            except:
+                            else:
                                 st.markdown(f"""
                                 <div class="availability-slot slot-available">
                                     <span><strong>{slot}</strong></span>
@@ -923,12 +1124,38 @@ def render_enhanced_footer():
 
 def auto_refresh_availability():
     if st.session_state.auto_refresh and st.session_state.availability_data and not st.session_state.demo_mode:
-        current_time = time.time()
-        if (st.session_state.last_availability_check is None or 
-            current_time - st.session_state.last_availability_check.timestamp() > 30):
-            
-            for date_str in list(st.session_state.availability_data.keys()):
-                get_availability(date_str, use_realtime=True)
+        dates = list(st.session_state.availability_data)
+        
+        # An invalidated cache (e.g. after a booking) is refetched right away, unless the
+        # data is only seconds old; it then stays marked stale until a later rerun
+        last_check = st.session_state.last_availability_check
+        if st.session_state.availability_stale or last_check is None:
+            if last_check is None or (datetime.now() - last_check).total_seconds() > AVAILABILITY_DEBOUNCE_SECONDS:
+                st.session_state.availability_stale = False
+                get_availability_many(dates)
+                return
+        
+        # A custom API URL gets no poller; its dates refresh inline once the interval passes
+        if st.session_state.api_url != DEFAULT_API_URL:
+            if (datetime.now() - last_check).total_seconds() > st.session_state.poll_interval:
+                get_availability_many(dates)
+            return
+        
+        # Otherwise renew this session's leases and read what the background poller has fetched
+        poller = start_poller()
+        now = time.monotonic()
+        with poller["lock"]:
+            wake = not all(d in poller["dates"] for d in dates) or st.session_state.poll_interval < poller["interval"]
+            poller["dates"].update(dict.fromkeys(dates, now))
+            poller["intervals"][st.session_state.user_id] = (st.session_state.poll_interval, now)
+            updated_at = poller["updated_at"]
+            polled = {d: poller["results"][d] for d in dates if d in poller["results"]}
+        if wake:
+            poller["wake"].set()
+        
+        if polled and updated_at and updated_at > st.session_state.last_availability_check:
+            st.session_state.availability_data.update(polled)
+            st.session_state.last_availability_check = updated_at
 
 def main():
     setup_page_config()
@@ -941,8 +1168,10 @@ def main():
     auto_refresh_availability()
     
     render_enhanced_sidebar()
-    render_enhanced_chat_interface()
-    handle_enhanced_chat_input()
+    if _fragment is not None:
+        _fragment(render_chat_panel)()
+    else:
+        render_chat_panel()
     render_enhanced_example_prompts()
     render_enhanced_controls()
     render_real_time_availability()
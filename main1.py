@@ -117,6 +117,9 @@ async def lifespan(app: FastAPI):
         cleaned_sessions = google_auth_manager.cleanup_expired_sessions()
         logger.info(f"Cleaned up {cleaned_sessions} expired sessions")
         
+        # Release pooled Google Calendar connections
+        multi_user_calendar_manager.close()
+        
         # Log final statistics
         uptime = datetime.now(pytz.timezone('Asia/Kolkata')) - system_state['startup_time']
         logger.info(f"Final Statistics:")
@@ -1,5 +1,6 @@
 import os
 import json
+import hashlib
 
 # Set up logging FIRST - before any logger usage
 import logging
@@ -26,8 +27,9 @@ from dotenv import load_dotenv
 import uvicorn
 import logging
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Depends, status, Query
+from fastapi import FastAPI, HTTPException, Depends, status, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
@@ -414,6 +416,9 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Compress JSON bodies (chat replies, availability) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # Initialize the AI agent globally (keeping your existing logic)
 booking_agent = None
 
@@ -562,8 +567,33 @@ class AvailabilityResponse(BaseModel):
     summary="Realtime Availability (alias)",
     description="Alias for /availability/{date} for compatibility"
 )
-async def realtime_availability(date: str):
-    return await get_availability(date)
+async def realtime_availability(date: str, response: Response, if_none_match: Optional[str] = Header(None)):
+    return await get_availability(date, response, if_none_match)
+
+class BatchAvailabilityRequest(BaseModel):
+    dates: List[str] = Field(..., min_length=1, max_length=14, description="Dates in YYYY-MM-DD format")
+
+@app.post(
+    "/realtime/availability/batch",
+    tags=["Calendar"],
+    summary="Batch Availability",
+    description="Availability for several dates in one request; invalid or past dates are omitted",
+    response_model=Dict[str, AvailabilityResponse]
+)
+async def batch_availability(request: BatchAvailabilityRequest):
+    dates = list(dict.fromkeys(request.dates))
+    # Each lookup runs its calendar call in a worker thread, so the dates are fetched side by side
+    outcomes = await asyncio.gather(*(check_availability(date_str) for date_str in dates), return_exceptions=True)
+    
+    results = {}
+    for date_str, outcome in zip(dates, outcomes):
+        if isinstance(outcome, HTTPException):
+            logger.info(f"Skipping {date_str} in batch availability: {outcome.detail}")
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[date_str] = outcome
+    return results
 class DateTimeParseRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=500, description="Natural language text to parse")
     
@@ -982,7 +1012,26 @@ async def chat_endpoint(message: ChatMessage):
     description="Get available time slots with service account calendar integration",
     response_model=AvailabilityResponse
 )
-async def get_availability(date: str):
+async def get_availability(date: str, response: Response, if_none_match: Optional[str] = Header(None)):
+    """
+    Check available time slots, answering 304 when the client's ETag still matches.
+    """
+    availability = await check_availability(date)
+    validator_headers = {"ETag": availability_etag(availability), "Cache-Control": "no-cache"}
+    if if_none_match == validator_headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers)
+    response.headers.update(validator_headers)
+    return availability
+
+def availability_etag(availability: AvailabilityResponse) -> str:
+    """
+    Strong validator over the date and its sorted slots; last_updated is left out
+    so an unchanged day keeps the same tag between polls.
+    """
+    payload = json.dumps([availability.date, sorted(availability.available_slots)])
+    return f'"{hashlib.sha1(payload.encode()).hexdigest()[:16]}"'
+
+async def check_availability(date: str):
     """
     Check available time slots using service account calendar integration.
     """
@@ -1009,8 +1058,8 @@ async def get_availability(date: str):
         else:
             calendar_manager = get_calendar_manager()
         
-        # Get available slots
-        available_slots = calendar_manager.get_availability(date)
+        # Get available slots; the Google call blocks, so keep it off the event loop
+        available_slots = await asyncio.to_thread(calendar_manager.get_availability, date)
         
         # Format date nicely
         formatted_date = parsed_date.strftime('%A, %B %d, %Y')